@@ -1,13 +1,22 @@
+import importlib
+
 import streamlit as st
 from streamlit_option_menu import option_menu
 
-# Importa as páginas
-import pages.risco as risco
-import pages.performance as performance
-import pages.estabilidade as estabilidade
-import pages.realizados as realizados
+from modules.data_store import data_status
+from utils.profiling import finish_rerun, start_rerun
 
-import pandas as pd
+# Páginas do menu -> módulo. Cada módulo é importado só quando a página é aberta
+# pela primeira vez no processo (depois fica em sys.modules)
+PAGES = {
+    "Risco": "pages.risco",
+    "Visão Geral": "pages.visao_geral",
+    "Realizados": "pages.realizados",
+    "Performance": "pages.performance",
+    "Estabilidade": "pages.estabilidade",
+    "Comparação": "pages.comparacao",
+}
+PAGE_ICONS = ["shield-check", "grid-3x3-gap", "bi-check2-circle", "bar-chart", "activity", "layers"]
 
 # -----------------------------
 # Configurações iniciais
@@ -26,16 +35,10 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 # -----------------------------
-# Inicializar datasets no session_state
+# Datasets
 # -----------------------------
-if "models" not in st.session_state:
-    st.session_state["models"] = pd.read_csv("data/models.csv")
-
-if "metrics" not in st.session_state:
-    st.session_state["metrics"] = pd.read_csv("data/metrics.csv")
-
-if "metricas_info" not in st.session_state:
-    st.session_state["metricas_info"] = pd.read_csv("data/metricas_descricao.csv")
+# Os dados são carregados uma única vez por processo em modules.data_store
+# e compartilhados (somente leitura) entre todas as sessões.
 
 # -----------------------------
 # Menu lateral
@@ -43,8 +46,8 @@ if "metricas_info" not in st.session_state:
 with st.sidebar:
     selected = option_menu(
         menu_title="Menu",
-        options=["Risco", "Realizados","Performance", "Estabilidade"],
-        icons=["shield-check", "bi-check2-circle", "bar-chart", "activity"],
+        options=list(PAGES),
+        icons=PAGE_ICONS,
         menu_icon="cast",
         default_index=0,
         orientation="vertical"
@@ -53,11 +56,20 @@ with st.sidebar:
 # -----------------------------
 # Roteamento para páginas
 # -----------------------------
-if selected == "Risco":
-    risco.run()
-elif selected == "Realizados":
-    realizados.run()
-elif selected == "Performance":
-    performance.run()
-elif selected == "Estabilidade":
-    estabilidade.run()
\ No newline at end of file
+start_rerun(selected)
+
+if selected in PAGES:
+    importlib.import_module(PAGES[selected]).run()
+
+# Versão dos dados em uso: uma versão nova é carregada em segundo plano e só
+# substitui a atual quando estiver pronta (ver modules.data_store)
+status = data_status()
+if status["as_of"] is not None:
+    caption = f"📅 Dados de {status['as_of']:%d/%m/%Y %H:%M}"
+    if status["refreshing"]:
+        caption += " · nova versão carregando…"
+    st.sidebar.caption(caption)
+if status["error"]:
+    st.sidebar.warning(f"Nova versão dos dados rejeitada ({status['error']}); exibindo a anterior.")
+
+finish_rerun()
@@ -0,0 +1,67 @@
+"""
+Benchmark: classificação de pontos por threshold (loop Python x versão vetorizada).
+
+Uso:
+    python -m benchmarks.bench_classificacao
+"""
+import timeit
+
+import numpy as np
+
+from modules.metrics import classify_thresholds
+
+
+def classify_loop(values, thresholds, direction):
+    """Implementação original de plot_metric_interactive (um if por ponto)"""
+    status = []
+    for val in values:
+        if direction == "neutral" or thresholds is None:
+            status.append(0)
+        elif direction == "higher_better":
+            if thresholds.get("alert") is not None and val < thresholds["alert"]:
+                status.append(2)
+            elif thresholds.get("attention") is not None and val < thresholds["attention"]:
+                status.append(1)
+            else:
+                status.append(0)
+        elif direction == "lower_better":
+            if thresholds.get("alert") is not None and val > thresholds["alert"]:
+                status.append(2)
+            elif thresholds.get("attention") is not None and val > thresholds["attention"]:
+                status.append(1)
+            else:
+                status.append(0)
+        else:
+            status.append(0)
+    return status
+
+
+def main():
+    rng = np.random.default_rng(42)
+    cases = [
+        ("higher_better", {"attention": 0.75, "alert": 0.70}),
+        ("lower_better", {"attention": 0.10, "alert": 0.25}),
+        ("lower_better", {"attention": 0.10, "alert": None}),
+    ]
+
+    print(f"{'n':>10} {'dtype':>8} {'direção':>14} {'loop (ms)':>12} {'vetorizado (ms)':>16} {'ganho':>8}")
+    for n in [100, 10_000, 1_000_000]:
+        # float32 é o dtype da tabela compacta; float64 é o de dados não compactados
+        for dtype in (np.float32, np.float64):
+            values = rng.uniform(0.0, 1.0, n).astype(dtype)
+            for direction, thresholds in cases:
+                expected = classify_loop(values, thresholds, direction)
+                result = classify_thresholds(values, thresholds["attention"], thresholds["alert"], direction)
+                assert result.tolist() == expected
+
+                repeat = max(1, 100_000 // n)
+                t_loop = timeit.timeit(lambda: classify_loop(values, thresholds, direction), number=repeat) / repeat
+                t_vec = timeit.timeit(
+                    lambda: classify_thresholds(values, thresholds["attention"], thresholds["alert"], direction),
+                    number=repeat,
+                ) / repeat
+                print(f"{n:>10} {np.dtype(dtype).name:>8} {direction:>14} {t_loop*1e3:>12.3f} "
+                      f"{t_vec*1e3:>16.3f} {t_loop/t_vec:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
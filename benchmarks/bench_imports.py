@@ -0,0 +1,94 @@
+"""
+Tempo de import (cold start) dos módulos do dashboard.
+
+Cada alvo é importado em um interpretador novo com `python -X importtime`; o
+relatório mostra o tempo acumulado do import, os módulos pesados carregados
+junto (matplotlib, plotly.express, ...) e os maiores contribuintes.
+
+Uso:
+    python -m benchmarks.bench_imports [--repeat 5] [--top 10] [alvos ...]
+
+Alvo especial "app": executa app.py uma vez (modo bare do Streamlit, página
+inicial Risco), ou seja, tudo o que uma sessão nova importa antes da primeira tela.
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_TARGETS = [
+    "app",
+    "modules.graficos",
+    "pages.risco",
+    "pages.performance",
+    "pages.realizados",
+    "pages.estabilidade",
+    "pages.visao_geral",
+    "pages.comparacao",
+]
+
+# Módulos cujo carregamento deve ficar adiado até o uso (plotly.graph_objects não
+# entra na lista: o próprio streamlit o importa)
+HEAVY_MODULES = [
+    "matplotlib.pyplot", "plotly.express",
+    "pages.visao_geral", "pages.realizados", "pages.performance", "pages.estabilidade",
+    "pages.comparacao",
+]
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+# Primeiro rerun de app.py fora do servidor (o Streamlit roda em modo bare)
+APP_SNIPPET = "import runpy; runpy.run_path('app.py')"
+
+
+def _snippet(target):
+    code = APP_SNIPPET if target == "app" else f"import {target}"
+    return f"{code}; import sys; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+
+
+def measure(target):
+    """(tempo acumulado em s, módulos pesados carregados, [(cumulativo, módulo)] dos dois primeiros níveis)"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _snippet(target)],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    entries = []
+    total = 0
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        cumulative, indent, name = int(match.group(2)), len(match.group(3)), match.group(4)
+        # Módulos de primeiro nível (indentação mínima) somam o tempo total;
+        # os do segundo nível mostram quem pesa dentro de cada alvo
+        if indent == 1:
+            total += cumulative
+        elif indent == 3:
+            entries.append((cumulative, name))
+    heavy = [m for m in proc.stdout.strip().splitlines()[-1].split(",") if m] if proc.stdout.strip() else []
+    return total / 1e6, heavy, sorted(entries, reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo de import dos módulos do dashboard")
+    parser.add_argument("targets", nargs="*", default=DEFAULT_TARGETS)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5, help="maiores imports de segundo nível exibidos")
+    args = parser.parse_args()
+
+    for target in args.targets:
+        runs = [measure(target) for _ in range(args.repeat)]
+        times = [t for t, _, _ in runs]
+        _, heavy, entries = runs[-1]
+        print(f"{target:<22} mediana {statistics.median(times)*1e3:8.1f} ms   min {min(times)*1e3:8.1f} ms"
+              f"   pesados: {', '.join(heavy) or '-'}")
+        for cumulative, name in entries[:args.top]:
+            print(f"    {cumulative/1e3:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
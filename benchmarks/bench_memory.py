@@ -0,0 +1,75 @@
+"""
+Memória da tabela de métricas em memória: como lida do CSV x esquema compacto.
+
+"Antes" é a tabela como o app a mantinha: CSV original (metric_value mistura
+números e os níveis de risk_level) com as datas convertidas para datetime64.
+"Depois" é a mesma tabela após storage.compact_metrics, como o data_store a carrega.
+
+Uso:
+    python -m benchmarks.bench_memory [--n-models 1000] [--months 120]
+    python -m benchmarks.bench_memory --csv data/metrics.csv
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from modules.storage import compact_metrics, memory_usage_mb
+from modules.synthetic import generate_models, iter_metrics, to_legacy_format
+
+
+def write_legacy_csv(path, n_models, n_months, seed):
+    """Grava um metrics.csv sintético no formato original"""
+    rng = np.random.default_rng(seed)
+    models = generate_models(n_models, rng)
+    months = pd.date_range("2015-01-01", periods=n_months, freq="MS")
+    for i, chunk in enumerate(iter_metrics(models, months, rng)):
+        to_legacy_format(chunk).to_csv(path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+
+
+def report(csv_path, string_dtype):
+    """Lê o CSV e imprime a memória por coluna antes e depois da compactação"""
+    with pd.option_context("future.infer_string", string_dtype == "str"):
+        before = pd.read_csv(csv_path)
+    before["date"] = pd.to_datetime(before["date"])
+
+    t0 = time.perf_counter()
+    after = compact_metrics(before)
+    elapsed = time.perf_counter() - t0
+
+    # metric_level só existe depois (níveis de risk_level separados de metric_value)
+    table = pd.DataFrame({"antes_mb": memory_usage_mb(before), "depois_mb": memory_usage_mb(after)}).fillna(0)
+    table.loc["total"] = table.sum()
+    table["redução"] = (1 - table["depois_mb"] / table["antes_mb"]).map("{:.0%}".format).where(table["antes_mb"] > 0, "-")
+
+    print(f"{len(before):,} linhas · texto lido como {string_dtype} · compactação em {elapsed:.2f} s")
+    print(pd.concat([before.dtypes.astype(str).rename("dtype_antes"),
+                     after.dtypes.astype(str).rename("dtype_depois")], axis=1).fillna("-").to_string())
+    print(table.round(2).to_string())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memória da tabela de métricas antes e depois da compactação")
+    parser.add_argument("--csv", help="metrics.csv existente (senão, gera dados sintéticos)")
+    parser.add_argument("--n-models", type=int, default=1_000)
+    parser.add_argument("--months", type=int, default=120)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = args.csv
+        if csv_path is None:
+            csv_path = os.path.join(tmp, "metrics.csv")
+            write_legacy_csv(csv_path, args.n_models, args.months, args.seed)
+
+        # object: pandas < 3 (strings como objetos Python); str: string dtype do pandas 3
+        for string_dtype in ["object", "str"]:
+            report(csv_path, string_dtype)
+            print()
+
+
+if __name__ == "__main__":
+    main()
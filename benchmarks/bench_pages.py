@@ -0,0 +1,251 @@
+"""
+Benchmark do caminho de dados das páginas com volumes crescentes de modelos.
+
+Gera dados sintéticos (modules.synthetic) para cada tamanho, mede tempo e pico
+de memória de cada etapa (carga, filtros, transformações, builders de gráficos)
+e do run() de cada página com o Streamlit substituído por um stub, e grava um
+relatório JSON.
+
+Uso:
+    python -m benchmarks.bench_pages [--sizes 10 1000 10000 100000] [--months 12]
+                                     [--repeat 5] [--output bench_report.json]
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+
+import numpy as np
+import pandas as pd
+
+
+# -----------------------------
+# Stub do Streamlit
+# -----------------------------
+class _Noop:
+    """Objeto que aceita qualquer chamada, atributo ou bloco with"""
+
+    def __call__(self, *args, **kwargs):
+        return _Noop()
+
+    def __getattr__(self, name):
+        return _Noop()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __iter__(self):
+        return iter([])
+
+
+class _StreamlitStub(types.ModuleType):
+    """Widgets retornam o valor padrão; elementos de saída não fazem nada"""
+
+    def __init__(self):
+        super().__init__("streamlit")
+        self.session_state = {}
+        self.sidebar = self
+
+    def selectbox(self, label, options, index=0, **kwargs):
+        options = list(options)
+        return options[index] if options else None
+
+    def date_input(self, label, value=None, **kwargs):
+        return pd.Timestamp(value).date() if value is not None else None
+
+    def checkbox(self, label, value=False, **kwargs):
+        return value
+
+    def multiselect(self, label, options, default=None, **kwargs):
+        return list(default or [])
+
+    def columns(self, spec, **kwargs):
+        n = spec if isinstance(spec, int) else len(spec)
+        return [_Noop() for _ in range(n)]
+
+    def tabs(self, labels, **kwargs):
+        return [_Noop() for _ in labels]
+
+    def __getattr__(self, name):
+        return _Noop()
+
+
+def install_streamlit_stub():
+    """Substitui o módulo streamlit antes de importar as páginas"""
+    sys.modules["streamlit"] = _StreamlitStub()
+
+
+# -----------------------------
+# Medição
+# -----------------------------
+def measure(fn, repeat):
+    """Executa fn repeat vezes; retorna (mediana em s, p95 em s, pico de memória em MB)"""
+    times = []
+    peak = 0
+    for _ in range(repeat):
+        tracemalloc.reset_peak()
+        start_mem = tracemalloc.get_traced_memory()[0]
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - start_mem)
+    p95 = float(np.percentile(times, 95))
+    return statistics.median(times), p95, peak / 1024**2
+
+
+def generate_dataset(data_dir, n_models, n_months, seed):
+    """Grava models/metrics/metricas_descricao sintéticos em data_dir (Parquet)"""
+    from modules.storage import write_metrics_chunks
+    from modules.synthetic import generate_models, iter_metrics, metrics_description
+
+    rng = np.random.default_rng(seed)
+    models = generate_models(n_models, rng)
+    models.to_parquet(os.path.join(data_dir, "models.parquet"), index=False)
+    months = pd.date_range("2015-01-01", periods=n_months, freq="MS")
+    write_metrics_chunks(iter_metrics(models, months, rng), os.path.join(data_dir, "metrics.parquet"))
+    metrics_description().to_parquet(os.path.join(data_dir, "metricas_descricao.parquet"), index=False)
+
+
+def bench_size(n_models, n_months, repeat, seed):
+    """Executa todas as etapas para um tamanho de inventário"""
+    from modules import data_store
+    from modules.alerts import build_alerts
+    from modules.figure_cache import figure_cache
+    from modules.graficos import (
+        plot_default_rates, plot_metric_comparison, plot_metric_interactive, plot_n_contratos, plot_pd_error,
+    )
+    from modules.metrics import (calculate_error, compute_default_rates, default_rates_frame, error_frame,
+                                 prepare_default_rates)
+    from modules.risk_matrix import plot_risk_matrix
+    from modules.rollups import build_rollups
+    import pages.comparacao
+    import pages.estabilidade
+    import pages.performance
+    import pages.realizados
+    import pages.risco
+    import pages.visao_geral
+
+    results = []
+
+    def record(stage, fn, n=repeat):
+        median, p95, peak_mb = measure(fn, n)
+        results.append({
+            "n_models": n_models,
+            "stage": stage,
+            "median_s": median,
+            "p95_s": p95,
+            "peak_mb": peak_mb,
+        })
+        print(f"{n_models:>8} {stage:<32} {median*1e3:>10.2f} ms {peak_mb:>9.1f} MB")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        generate_dataset(data_dir, n_models, n_months, seed)
+        data_store.DATA_DIR = data_dir
+
+        def load():
+            data_store.clear_cache()
+            data_store.get_dataset("models")
+            data_store.get_dataset("metricas_info")
+            data_store.get_metrics_store()
+
+        record("load", load, n=1)
+        record("rollups:build", lambda: build_rollups(data_store.get_metrics_store()), n=1)
+        record("alerts:build", lambda: build_alerts(data_store.get_metrics_store(), data_store.get_dataset("metricas_info")), n=1)
+
+        df_models = data_store.get_dataset("models")
+        store = data_store.get_metrics_store()
+        model_id = int(df_models["id"].iloc[len(df_models) // 2])
+        vol = df_models["vol_carteira"].iloc[len(df_models) // 2]
+        start, end = store.date_min, store.date_max
+        defaults = ["taxa_default_realizada", "taxa_default_estimada"]
+        thresholds = {"attention": 0.75, "alert": 0.70}
+
+        series = store.get_series(model_id, "ROC-AUC", start, end)
+        df_default = store.get_metrics(model_id, defaults, start, end).sort_values("date", kind="stable")
+        df_rates = prepare_default_rates(df_default)
+        df_error, ytitle, yrange, tsuffix = calculate_error(df_default, vol)
+        df_vol = store.get_series(model_id, "vol_contratos", start, end)
+
+        record("filter:get_series", lambda: store.get_series(model_id, "ROC-AUC", start, end))
+        record("filter:get_metrics", lambda: store.get_metrics(model_id, defaults, start, end))
+        record("prepare_default_rates", lambda: prepare_default_rates(df_default))
+        record("calculate_error", lambda: calculate_error(df_default, vol))
+        rates = compute_default_rates(df_default, vol)
+        record("default_rates_frame", lambda: default_rates_frame(rates))
+        record("error_frame", lambda: error_frame(rates))
+        vols = df_models.set_index("id")["vol_carteira"]
+        record("compute_default_rates:carteira", lambda: compute_default_rates(store.frame, vols))
+        record("plot_metric_interactive",
+               lambda: plot_metric_interactive(series, "ROC-AUC", thresholds, "higher_better"))
+        record("plot_default_rates", lambda: plot_default_rates(df_rates))
+        record("plot_pd_error", lambda: plot_pd_error(df_error, ytitle, yrange, tsuffix))
+        record("plot_n_contratos", lambda: plot_n_contratos(df_vol, "date", "metric_value"))
+        record("plot_risk_matrix", lambda: plot_risk_matrix(df_models))
+
+        compared = df_models["id"].head(200).tolist()
+        record("filter:get_series_many", lambda: store.get_series_many(compared, "ROC-AUC", start, end))
+        df_compared = store.get_series_many(compared, "ROC-AUC", start, end)
+        record("plot_metric_comparison",
+               lambda: plot_metric_comparison(df_compared, "ROC-AUC", None, thresholds, "higher_better"))
+
+        pages_run = [pages.visao_geral, pages.risco, pages.realizados, pages.performance, pages.estabilidade,
+                     pages.comparacao]
+        for page in pages_run:
+            name = page.__name__.split(".")[-1]
+
+            def run_cold(page=page):
+                figure_cache.invalidate()
+                page.run()
+
+            record(f"page:{name}", run_cold)
+            record(f"page:{name}:cached", page.run)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das páginas do dashboard")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1_000, 10_000, 100_000])
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="bench_report.json")
+    args = parser.parse_args()
+
+    install_streamlit_stub()
+    tracemalloc.start()
+
+    results = []
+    for n_models in args.sizes:
+        results.extend(bench_size(n_models, args.months, args.repeat, args.seed))
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "months": args.months,
+            "repeat": args.repeat,
+            # Pico de memória residente do processo (inclui buffers do pyarrow, que o tracemalloc não vê)
+            "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"{args.output} criado com sucesso!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Agrega os extratos de contratos nas taxas de default realizada x estimada por
+modelo e mês e grava o resultado na tabela de métricas, sem o Streamlit.
+
+Uso:
+    python compute_default_rates.py [--contracts-dir data/contracts] [--data-dir data]
+                                    [--workers 8] [--batch-rows 1000000]
+
+Os extratos têm uma linha por contrato e mês (model_id, month, pd, default,
+exposure) em Arrow IPC sem compressão, .npy estruturado ou Parquet; são mapeados
+em memória e reduzidos bloco a bloco. O resultado (metric_type="default":
+taxa_default_realizada, taxa_default_estimada, vol_contratos e as taxas
+ponderadas por exposição) é gravado como uma partição em <data-dir>/metrics/.
+"""
+import argparse
+import os
+import time
+
+from modules.data_store import PARTITIONS_DIR
+from modules.default_rates import BATCH_ROWS, aggregate_default_rates
+from modules.aggregation import write_partition
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Taxas de default por modelo e mês a partir dos extratos de contratos")
+    parser.add_argument("--contracts-dir", default=os.path.join("data", "contracts"))
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="processos de agregação")
+    parser.add_argument("--batch-rows", type=int, default=BATCH_ROWS, help="linhas reduzidas por vez")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    df = aggregate_default_rates(args.contracts_dir, workers=args.workers, batch_rows=args.batch_rows)
+    path = write_partition(df, os.path.join(args.data_dir, PARTITIONS_DIR), prefix="default")
+    print(f"{path} criado com sucesso! ({len(df)} linhas, {time.perf_counter() - t0:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Calcula as métricas de performance (ROC-AUC, KS, Accuracy, RMSE, R2) dos modelos
+a partir dos extratos de score por contrato e grava o resultado na tabela de
+métricas, sem o Streamlit.
+
+Uso:
+    python compute_performance.py [--scores-dir data/scores] [--data-dir data] [--workers 8]
+                                  [--threshold 0.5] [--chunksize 500000] [--score-bins 1000]
+
+Os extratos (CSV ou Parquet) têm uma linha por contrato e mês com model_id, date,
+score e target (0/1, ou contínuo para modelos de regressão). O resultado
+(metric_type="performance") é gravado como uma partição em <data-dir>/metrics/,
+incorporada pelo app sem recarregar a tabela.
+"""
+import argparse
+import os
+import time
+
+from modules.data_store import PARTITIONS_DIR
+from modules.performance import ACCURACY_THRESHOLD, SCORE_BINS, compute_performance
+from modules.aggregation import write_partition
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calcula métricas de performance a partir dos extratos de score")
+    parser.add_argument("--scores-dir", default=os.path.join("data", "scores"))
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="processos de leitura")
+    parser.add_argument("--threshold", type=float, default=ACCURACY_THRESHOLD, help="score de corte da Accuracy")
+    parser.add_argument("--chunksize", type=int, default=500_000, help="linhas lidas por bloco")
+    parser.add_argument("--score-bins", type=int, default=SCORE_BINS, help="faixas de score para AUC/KS")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    df = compute_performance(
+        args.scores_dir, workers=args.workers, chunksize=args.chunksize,
+        threshold=args.threshold, score_bins=args.score_bins,
+    )
+    path = write_partition(df, os.path.join(args.data_dir, PARTITIONS_DIR), prefix="performance")
+    print(f"{path} criado com sucesso! ({len(df)} linhas, {time.perf_counter() - t0:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
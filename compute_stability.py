@@ -0,0 +1,47 @@
+"""
+Calcula o PSI (score) e o CSI (por variável) dos modelos a partir dos extratos de
+score por contrato e grava o resultado na tabela de métricas, sem o Streamlit.
+
+Uso:
+    python compute_stability.py [--scores-dir data/scores] [--data-dir data] [--workers 8]
+                                [--reference-start 2025-01-01] [--reference-end 2025-03-01]
+                                [--chunksize 500000] [--fine-bins 100] [--bins 10]
+
+Os extratos (CSV ou Parquet) têm uma linha por contrato e mês: model_id, date,
+score e as variáveis do modelo. Sem janela de referência, cada modelo é comparado
+ao seu primeiro mês. O resultado (metric_type="stability") é gravado como uma
+partição em <data-dir>/metrics/, incorporada pelo app sem recarregar a tabela.
+"""
+import argparse
+import os
+import time
+
+from modules.data_store import PARTITIONS_DIR
+from modules.aggregation import write_partition
+from modules.stability import FINE_BINS, PSI_BINS, compute_stability
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calcula PSI/CSI a partir dos extratos de score por contrato")
+    parser.add_argument("--scores-dir", default=os.path.join("data", "scores"))
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="processos de leitura")
+    parser.add_argument("--reference-start", help="primeiro mês da janela de referência")
+    parser.add_argument("--reference-end", help="último mês da janela de referência")
+    parser.add_argument("--chunksize", type=int, default=500_000, help="linhas lidas por bloco")
+    parser.add_argument("--fine-bins", type=int, default=FINE_BINS, help="faixas finas por coluna na leitura")
+    parser.add_argument("--bins", type=int, default=PSI_BINS, help="faixas de quantis da referência no PSI")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    df = compute_stability(
+        args.scores_dir, workers=args.workers, chunksize=args.chunksize,
+        reference_start=args.reference_start, reference_end=args.reference_end,
+        fine_bins=args.fine_bins, psi_bins=args.bins,
+    )
+    path = write_partition(df, os.path.join(args.data_dir, PARTITIONS_DIR), prefix="stability")
+    print(f"{path} criado com sucesso! ({len(df)} linhas, {time.perf_counter() - t0:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
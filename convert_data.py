@@ -0,0 +1,67 @@
+"""
+Converte os CSVs de data/ para Parquet ou para um banco SQLite embarcado.
+
+Uso:
+    python convert_data.py [--data-dir data] [--chunksize 2000000]
+    python convert_data.py --format sqlite
+
+Após a conversão para Parquet o app passa a ler os arquivos .parquet automaticamente.
+O banco SQLite (data/monitor.db) é usado com MONITOR_BACKEND=sqlite.
+"""
+import argparse
+import os
+
+import pandas as pd
+
+from modules.data_store import SQLITE_FILE
+from modules.sql_store import build_database
+from modules.storage import convert_metrics_csv
+
+
+def convert_parquet(args):
+    # Tabela longa de métricas: conversão em blocos com esquema tipado
+    src = os.path.join(args.data_dir, "metrics.csv")
+    dst = os.path.join(args.data_dir, "metrics.parquet")
+    n_rows = convert_metrics_csv(src, dst, chunksize=args.chunksize, row_group_size=args.row_group_size)
+    print(f"{dst} criado com sucesso! ({n_rows} linhas)")
+
+    # Tabelas pequenas: conversão direta
+    for name in ["models", "metricas_descricao"]:
+        src = os.path.join(args.data_dir, f"{name}.csv")
+        dst = os.path.join(args.data_dir, f"{name}.parquet")
+        pd.read_csv(src).to_parquet(dst, index=False)
+        print(f"{dst} criado com sucesso!")
+
+
+def convert_sqlite(args):
+    # O banco é montado em um arquivo temporário e trocado de uma vez: o app em
+    # execução continua lendo o banco antigo até perceber o arquivo novo
+    dst = os.path.join(args.data_dir, SQLITE_FILE)
+    tmp = dst + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+
+    models = pd.read_csv(os.path.join(args.data_dir, "models.csv"))
+    metrics_desc = pd.read_csv(os.path.join(args.data_dir, "metricas_descricao.csv"))
+    chunks = pd.read_csv(os.path.join(args.data_dir, "metrics.csv"), chunksize=args.chunksize)
+    n_rows = build_database(tmp, models, chunks, metrics_desc)
+    os.replace(tmp, dst)
+    print(f"{dst} criado com sucesso! ({n_rows} linhas)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Converte os dados do monitoramento para Parquet ou SQLite")
+    parser.add_argument("--data-dir", default="data", help="diretório com models.csv, metrics.csv e metricas_descricao.csv")
+    parser.add_argument("--format", choices=["parquet", "sqlite"], default="parquet", help="formato de destino")
+    parser.add_argument("--chunksize", type=int, default=2_000_000, help="linhas de CSV lidas por bloco")
+    parser.add_argument("--row-group-size", type=int, default=1_000_000, help="linhas por row group no Parquet")
+    args = parser.parse_args()
+
+    if args.format == "sqlite":
+        convert_sqlite(args)
+    else:
+        convert_parquet(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+Exporta o pacote estático de gráficos (PNG ou PDF) de todos os modelos, sem o Streamlit.
+
+Uso:
+    python export_report.py [--data-dir data] [--output-dir relatorio] [--workers 8]
+                            [--format png|pdf] [--dpi 100] [--batch-size 20]
+
+Por modelo: gráficos das métricas de performance/estabilidade, taxas de default e
+erro de PD; mais a matriz de risco da carteira.
+"""
+import argparse
+import os
+import time
+
+from modules.report import export_report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta os gráficos de todos os modelos")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--output-dir", default="relatorio")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="processos de renderização")
+    parser.add_argument("--format", choices=["png", "pdf"], default="png")
+    parser.add_argument("--dpi", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=20, help="modelos por tarefa enviada a um processo")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    n_files = export_report(
+        args.data_dir, args.output_dir, workers=args.workers, fmt=args.format,
+        dpi=args.dpi, batch_size=args.batch_size,
+    )
+    print(f"{n_files} arquivos gravados em {args.output_dir} ({time.perf_counter() - t0:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import os
+import uuid
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from modules.storage import write_metrics_parquet
+
+# -----------------------------
+# Chaves (modelo, mês)
+# -----------------------------
+# Os extratos por contrato (modules.stability, modules.performance,
+# modules.default_rates) são agregados por modelo e mês em dicts
+# {chave: acumulado}, somados entre blocos e entre processos do pool.
+# Chave inteira (modelo, mês): model_id * _MONTH_SPAN + mês desde 1970 + _MONTH_SPAN / 2
+_MONTH_SPAN = 1 << 16
+
+
+def make_keys(model_ids, dates):
+    """Chave inteira (modelo, mês) a partir de arrays de model_id e datas (datetime64)"""
+    months = np.asarray(dates).astype("datetime64[M]").astype(np.int64)
+    return np.asarray(model_ids, dtype=np.int64) * _MONTH_SPAN + months + _MONTH_SPAN // 2
+
+
+def group_keys(chunk):
+    """Chave (modelo, mês) de cada linha"""
+    return make_keys(chunk["model_id"].to_numpy(), pd.to_datetime(chunk["date"]).to_numpy())
+
+
+def split_keys(keys):
+    """Chaves (modelo, mês) -> (model_id, mês desde 1970)"""
+    return keys // _MONTH_SPAN, keys % _MONTH_SPAN - _MONTH_SPAN // 2
+
+
+def month_dates(months):
+    """Meses desde 1970 -> datas (primeiro dia do mês) em datetime64[ns]"""
+    return months.astype("datetime64[M]").astype("datetime64[ns]")
+
+
+def model_blocks(keys, group):
+    """
+    Linhas de um bloco separadas por modelo. keys: chaves (modelo, mês) ordenadas;
+    group: posição da chave de cada linha em keys.
+    Gera (model_id, i, j, linhas): as chaves do modelo são keys[i:j] e linhas
+    indexa as suas linhas no bloco (um slice quando o bloco tem um só modelo).
+    """
+    model_ids = split_keys(keys)[0]
+    starts = np.flatnonzero(np.append(True, model_ids[1:] != model_ids[:-1]))
+    stops = np.append(starts[1:], len(keys))
+    if len(starts) == 1:
+        yield int(model_ids[0]), 0, len(keys), slice(None)
+        return
+    order = np.argsort(group, kind="stable")
+    row_starts = np.searchsorted(group[order], starts)
+    row_stops = np.append(row_starts[1:], len(order))
+    for i, j, a, b in zip(starts.tolist(), stops.tolist(), row_starts.tolist(), row_stops.tolist()):
+        yield int(model_ids[i]), i, j, order[a:b]
+
+
+def add_rows(by_key, keys, rows):
+    """Soma cada linha de rows ao acumulado da chave correspondente em by_key"""
+    for key, row in zip(keys, rows):
+        if key in by_key:
+            by_key[key] += row
+        else:
+            by_key[key] = row.copy()
+
+
+# -----------------------------
+# Partições da tabela de métricas
+# -----------------------------
+def write_partition(df, partitions_dir, prefix):
+    """
+    Grava as métricas como uma partição da tabela de métricas (ver
+    data_store.PARTITIONS_DIR): o app as acrescenta ao índice sem recarregar o resto.
+    prefix identifica o script de origem no nome do arquivo, que leva também a
+    data/hora e um sufixo aleatório: duas execuções no mesmo segundo (ex.: um
+    laço por lote de modelos) gravam arquivos distintos. O arquivo é gravado com
+    nome temporário e renomeado ao final. Cada execução grava uma partição nova;
+    na ingestão, as chaves (model_id, metric_name, date) recalculadas ficam com o
+    valor da partição mais nova (ordem de mtime, não de nome).
+    """
+    os.makedirs(partitions_dir, exist_ok=True)
+    name = f"{prefix}_{datetime.now():%Y%m%d%H%M%S}_{uuid.uuid4().hex[:8]}.parquet"
+    tmp = os.path.join(partitions_dir, f"_{name}")
+    write_metrics_parquet(df, tmp)
+    path = os.path.join(partitions_dir, name)
+    os.replace(tmp, path)
+    return path
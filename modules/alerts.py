@@ -0,0 +1,214 @@
+import numpy as np
+import pandas as pd
+
+from modules.metrics import STATUS_ATTENTION, STATUS_GOOD, classify_thresholds
+from modules.portfolio import PORTFOLIO_TYPES
+
+# -----------------------------
+# Parâmetros dos detectores
+# -----------------------------
+# Linha de base de cada série: média e desvio dos primeiros pontos válidos.
+# CUSUM e EWMA trabalham sobre a série padronizada por ela.
+BASELINE_POINTS = 12
+# Desvio mínimo, relativo à média da linha de base (séries quase constantes)
+MIN_SIGMA = 0.01
+
+# CUSUM tabular: folga k e limite de decisão h, em desvios
+CUSUM_K = 0.5
+CUSUM_H = 5.0
+# Carta EWMA: peso do ponto novo e largura dos limites de controle, em desvios
+EWMA_LAMBDA = 0.2
+EWMA_L = 3.0
+
+RULES = ["threshold", "cusum", "ewma"]
+RULE_LABELS = {"threshold": "Threshold", "cusum": "CUSUM", "ewma": "EWMA"}
+EVENT_COLUMNS = ["model_id", "metric_name", "date", "rule", "severity", "value", "statistic"]
+
+
+# -----------------------------
+# Grade modelos x meses
+# -----------------------------
+def metric_grids(store, metric_names):
+    """
+    Séries mensais de todas as combinações modelo x métrica como arrays 2-D.
+    Retorna (model_ids, meses em datetime64[ns], {métrica: array modelos x meses}),
+    com NaN nos meses sem valor. Vários pontos no mesmo mês: vale o último.
+    A grade mantém o dtype dos valores (float32 na tabela compacta): os thresholds
+    são comparados ao valor armazenado, sem o arredondamento de um alargamento.
+    """
+    df = store.frame
+    selected = df["metric_name"].isin(metric_names).to_numpy()
+    rows = df[selected]
+    values = pd.to_numeric(rows["metric_value"], errors="coerce").to_numpy()
+    if values.dtype.kind != "f":
+        values = values.astype(float)
+    if len(rows) == 0:
+        return np.array([], dtype=np.int64), np.array([], dtype="datetime64[ns]"), {}
+
+    model_ids, model_index = np.unique(rows["model_id"].to_numpy(), return_inverse=True)
+    months = rows["date"].to_numpy().astype("datetime64[M]").astype(np.int64)
+    first = months.min()
+    month_index = months - first
+    n_months = int(month_index.max()) + 1
+    metric_index = pd.Categorical(rows["metric_name"], categories=list(metric_names)).codes
+
+    grid = np.full((len(metric_names), len(model_ids), n_months), np.nan, dtype=values.dtype)
+    grid[metric_index, model_index, month_index] = values
+    dates = (first + np.arange(n_months)).astype("datetime64[M]").astype("datetime64[ns]")
+    return model_ids, dates, dict(zip(metric_names, grid))
+
+
+def baseline(grid, n_points=BASELINE_POINTS):
+    """Média e desvio (por linha) dos primeiros n_points valores válidos; NaN sem ao menos 2 pontos"""
+    valid = ~np.isnan(grid)
+    in_base = valid & (np.cumsum(valid, axis=1) <= n_points)
+    count = in_base.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.where(in_base, grid, 0).sum(axis=1) / count
+        var = np.where(in_base, (grid - mean[:, None]) ** 2, 0).sum(axis=1) / (count - 1)
+    sigma = np.maximum(np.sqrt(var), MIN_SIGMA * np.abs(mean))
+    sigma = np.where((count >= 2) & (sigma > 0), sigma, np.nan)
+    return mean, sigma
+
+
+# -----------------------------
+# Detectores (vetorizados sobre os modelos; laço apenas no eixo do tempo)
+# -----------------------------
+def cusum(z, k=CUSUM_K, h=CUSUM_H):
+    """
+    CUSUM tabular bilateral sobre a série padronizada z (modelos x meses).
+    Retorna (estatística de alta, estatística de baixa), com o valor no mês em que
+    o limite h foi ultrapassado e NaN nos demais; após um alarme a soma recomeça.
+    Meses sem valor mantêm as somas.
+    """
+    n_rows, n_months = z.shape
+    high = np.zeros(n_rows)
+    low = np.zeros(n_rows)
+    alarm_high = np.full(z.shape, np.nan)
+    alarm_low = np.full(z.shape, np.nan)
+    for t in range(n_months):
+        zt = z[:, t]
+        ok = ~np.isnan(zt)
+        high = np.where(ok, np.maximum(0, high + zt - k), high)
+        low = np.where(ok, np.maximum(0, low - zt - k), low)
+        up, down = high > h, low > h
+        alarm_high[up, t] = high[up]
+        alarm_low[down, t] = low[down]
+        high[up] = 0
+        low[down] = 0
+    return alarm_high, alarm_low
+
+
+def ewma(z, lam=EWMA_LAMBDA, width=EWMA_L):
+    """
+    Carta EWMA sobre a série padronizada z (modelos x meses), começando na média da
+    linha de base. Retorna (estatística, limite de controle) por mês; o limite
+    cresce com o número de pontos observados até o valor assintótico.
+    """
+    n_rows, n_months = z.shape
+    level = np.zeros(n_rows)
+    seen = np.zeros(n_rows)
+    stat = np.full(z.shape, np.nan)
+    limit = np.full(z.shape, np.nan)
+    for t in range(n_months):
+        zt = z[:, t]
+        ok = ~np.isnan(zt)
+        level = np.where(ok, lam * np.nan_to_num(zt) + (1 - lam) * level, level)
+        seen += ok
+        stat[ok, t] = level[ok]
+        limit[ok, t] = width * np.sqrt(lam / (2 - lam) * (1 - (1 - lam) ** (2 * seen[ok])))
+    return stat, limit
+
+
+def threshold_crossings(grid, attention, alert, direction):
+    """
+    Status (bom/atenção/alerta) de cada ponto e máscara dos pontos em que o status
+    piora em relação ao ponto válido anterior (o primeiro ponto é comparado a "bom").
+    """
+    valid = ~np.isnan(grid)
+    status = classify_thresholds(grid, attention, alert, direction)
+    positions = np.where(valid, np.arange(grid.shape[1]), -1)
+    last_valid = np.maximum.accumulate(positions, axis=1)
+    previous = np.concatenate((np.full((grid.shape[0], 1), -1), last_valid[:, :-1]), axis=1)
+    rows = np.arange(grid.shape[0])[:, None]
+    previous_status = np.where(previous >= 0, status[rows, np.maximum(previous, 0)], STATUS_GOOD)
+    return status, valid & (status > previous_status)
+
+
+def _events(mask, model_ids, dates, metric, rule, severity, values, statistic):
+    i, t = np.nonzero(mask)
+    return pd.DataFrame({
+        "model_id": model_ids[i],
+        "metric_name": metric,
+        "date": dates[t],
+        "rule": rule,
+        "severity": np.broadcast_to(severity, mask.shape)[i, t].astype(np.int8),
+        "value": values[i, t],
+        "statistic": statistic[i, t],
+    })
+
+
+def detect(grid, model_ids, dates, metric, attention, alert, direction):
+    """
+    Eventos de alerta de uma métrica para todas as séries (linhas de grid) de uma vez:
+    - threshold: o status piora (entrada em atenção ou em alerta); severidade = novo status
+    - cusum: alarme do CUSUM; statistic = soma acumulada (negativa para quedas)
+    - ewma: início de uma saída dos limites de controle; statistic = EWMA em desvios
+    CUSUM e EWMA (severidade atenção) só consideram o lado adverso da métrica
+    (queda para higher_better, alta para lower_better; os dois para neutral).
+    """
+    status, crossed = threshold_crossings(grid, attention, alert, direction)
+    thresholds = np.where(status == STATUS_ATTENTION, attention, alert).astype(float)
+    frames = [_events(crossed, model_ids, dates, metric, "threshold", status, grid, thresholds)]
+
+    # Linha de base e cartas de controle em float64 (somas acumuladas)
+    wide = grid.astype(float)
+    mean, sigma = baseline(wide)
+    z = (wide - mean[:, None]) / sigma[:, None]
+    watch_high = direction != "higher_better"
+    watch_low = direction != "lower_better"
+
+    high, low = cusum(z)
+    if watch_high:
+        frames.append(_events(~np.isnan(high), model_ids, dates, metric, "cusum", STATUS_ATTENTION, grid, high))
+    if watch_low:
+        frames.append(_events(~np.isnan(low), model_ids, dates, metric, "cusum", STATUS_ATTENTION, grid, -low))
+
+    stat, limit = ewma(z)
+    with np.errstate(invalid="ignore"):
+        out = ((stat > limit) & watch_high) | ((stat < -limit) & watch_low)
+    # Só o primeiro mês de cada saída dos limites (o mês anterior estava dentro)
+    out_before = np.concatenate((np.zeros((len(out), 1), dtype=bool), out[:, :-1]), axis=1)
+    frames.append(_events(out & ~out_before, model_ids, dates, metric, "ewma", STATUS_ATTENTION, grid, stat))
+    return pd.concat(frames, ignore_index=True)
+
+
+def build_alerts(store, metrics_desc, types=PORTFOLIO_TYPES):
+    """
+    Avalia as regras de alerta (threshold, CUSUM e EWMA) sobre todas as séries
+    modelo x métrica dos tipos informados. Cada métrica vira uma grade modelos x
+    meses e os detectores operam sobre a grade inteira (uma por bloco de modelos
+    de store.iter_blocks; em memória, um único bloco).
+    Retorna a tabela de eventos (EVENT_COLUMNS), ordenada por modelo, métrica e data.
+    """
+    desc = metrics_desc[metrics_desc["type"].isin(types)].set_index("metric_name")
+
+    frames = [pd.DataFrame(columns=EVENT_COLUMNS)]
+    for block in store.iter_blocks():
+        model_ids, dates, grids = metric_grids(block, desc.index.tolist())
+        for metric, grid in grids.items():
+            row = desc.loc[metric]
+            attention = float(row["attention"]) if pd.notna(row["attention"]) else np.nan
+            alert = float(row["alert"]) if pd.notna(row["alert"]) else np.nan
+            frames.append(detect(grid, model_ids, dates, metric, attention, alert, row["direction"]))
+    events = pd.concat([f for f in frames if len(f)] or frames[:1], ignore_index=True)
+    return events.sort_values(["model_id", "metric_name", "date"], kind="stable", ignore_index=True)
+
+
+def update_alerts(events, store, metrics_desc, model_ids, types=PORTFOLIO_TYPES):
+    """Reavalia apenas as séries dos modelos informados (após ingestão incremental)"""
+    fresh = build_alerts(store.subset(model_ids), metrics_desc, types)
+    kept = events[~events["model_id"].isin(list(model_ids))]
+    return pd.concat([kept, fresh], ignore_index=True).sort_values(
+        ["model_id", "metric_name", "date"], kind="stable", ignore_index=True
+    )
@@ -0,0 +1,540 @@
+import os
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+from modules.figure_cache import figure_cache
+from modules.metrics_store import SORT_KEYS, MetricsStore, last_per_key
+from modules.rollups import build_rollups
+from modules.sql_store import SqlMetricsStore
+from modules.storage import compact_metrics
+
+# -----------------------------
+# Arquivos de dados da aplicação
+# -----------------------------
+DATA_DIR = "data"
+
+# Nome do dataset -> nome base do arquivo. Se existir uma versão .parquet
+# (gerada pelo convert_data.py), ela é usada no lugar do .csv.
+DATASETS = {
+    "models": "models",
+    "metrics": "metrics",
+    "metricas_info": "metricas_descricao",
+}
+
+# Backend da tabela de métricas: "memory" (CSV/Parquet carregados em memória)
+# ou "sqlite" (banco embarcado gerado por convert_data.py --format sqlite)
+BACKEND = os.environ.get("MONITOR_BACKEND", "memory")
+SQLITE_FILE = "monitor.db"
+
+# Subdiretório de DATA_DIR monitorado para lotes incrementais da tabela de métricas
+# (ex.: data/metrics/2025-07.csv). Cada arquivo novo é acrescentado ao índice em
+# memória sem reler metrics.csv. Grave o arquivo com outro nome e renomeie ao final;
+# nomes iniciados por "." ou "_" são ignorados.
+PARTITIONS_DIR = "metrics"
+
+# Cache por processo: caminho -> (mtime, DataFrame)
+_cache = {}
+# Reentrante: os cálculos feitos sob o lock (ex.: cached_derived) podem ler datasets
+_lock = threading.RLock()
+
+# Índice da tabela de métricas: (origem, store). A origem é o DataFrame carregado
+# (backend memory) ou (caminho, inode) do banco (backend sqlite).
+_store = (None, None)
+
+# Partições já incorporadas ao índice atual
+_ingested = set()
+
+# st_mtime_ns do diretório de partições na última varredura (None: diretório
+# ausente; _UNSCANNED: ainda não varrido). O caminho das requisições só compara
+# este valor (um stat), sem listar o diretório; a varredura e a ingestão rodam
+# em segundo plano (ver _refresh_partitions).
+_UNSCANNED = -1
+_partitions_mtime = _UNSCANNED
+
+# Agregados por período (modules.rollups) do índice atual: (store, Rollups).
+# Calculados na carga e na recarga do índice e atualizados na ingestão de
+# partições, nunca no caminho de uma requisição de página.
+_rollups = (None, None)
+
+# Resultados derivados dos dados: nome -> (data_version, valor, função de atualização)
+_derived = {}
+
+# Recarga em segundo plano: caminhos sendo relidos e última falha por caminho (mtime, mensagem)
+_refreshing = set()
+_refresh_errors = {}
+_refresh_lock = threading.Lock()
+
+
+def _read_table(path):
+    """Lê um arquivo de dados do disco (CSV ou Parquet)"""
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+def _prepare_metrics(df):
+    """
+    Normalização feita uma única vez na ingestão da tabela de métricas:
+    esquema compacto (ver storage.compact_metrics), linhas ordenadas por
+    (model_id, metric_name, date), a ordem usada pelo MetricsStore, e uma
+    linha por chave (a última do arquivo).
+    """
+    return last_per_key(compact_metrics(df).sort_values(SORT_KEYS, kind="stable", ignore_index=True))
+
+
+# Preparação aplicada a cada dataset logo após a leitura do disco
+_PREPARE = {
+    "metrics": _prepare_metrics,
+}
+
+# Colunas exigidas em cada dataset; uma versão nova sem elas não substitui a atual
+REQUIRED_COLUMNS = {
+    "models": ["id", "name", "vol_carteira"],
+    "metrics": ["model_id", "metric_name", "metric_value", "metric_type", "date"],
+    "metricas_info": ["metric_name", "type", "attention", "alert", "direction"],
+}
+
+
+def _validate(df, required):
+    """Falha (ValueError) se a tabela estiver vazia ou sem alguma coluna exigida"""
+    if df.empty:
+        raise ValueError("arquivo sem linhas")
+    missing = [column for column in required or [] if column not in df.columns]
+    if missing:
+        raise ValueError(f"colunas ausentes: {', '.join(missing)}")
+
+
+def dataset_path(name):
+    """Caminho do arquivo do dataset, preferindo o formato colunar quando disponível"""
+    base = os.path.join(DATA_DIR, DATASETS[name])
+    if os.path.exists(base + ".parquet"):
+        return base + ".parquet"
+    return base + ".csv"
+
+
+def load_table(path, prepare=None, required=None):
+    """
+    Carrega uma tabela compartilhada entre todas as sessões do processo.
+    A leitura é feita uma única vez por (caminho, mtime). Se o arquivo for
+    alterado no disco, a versão nova é lida e validada em segundo plano e a
+    atual continua sendo servida até a troca (ver _refresh).
+    prepare, se informado, é aplicado uma vez ao DataFrame recém-lido;
+    required lista as colunas exigidas.
+    Retorna None se o arquivo não existir ou se a primeira versão lida for
+    inválida (o erro fica em data_status() até o arquivo ser corrigido).
+    """
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+
+    entry = _cache.get(path)
+    if entry is not None:
+        if entry[0] != mtime:
+            _schedule_refresh(path, mtime, prepare, required)
+        return entry[1]
+
+    # Primeira carga: não há versão anterior para servir
+    with _lock:
+        # Outra thread pode ter carregado a tabela enquanto esperávamos o lock
+        entry = _cache.get(path)
+        if entry is not None:
+            return entry[1]
+        with _refresh_lock:
+            failed = _refresh_errors.get(path)
+        if failed is not None and failed[0] == mtime:
+            return None
+        try:
+            df = _read_table(path)
+            _validate(df, required)
+            if prepare is not None:
+                df = prepare(df)
+        except Exception as exc:
+            _record_error(path, mtime, exc)
+            return None
+        _cache[path] = (mtime, df)
+        _record_error(path, mtime, None)
+        return df
+
+
+def _record_error(path, mtime, exc):
+    """Registra (ou, com exc None, limpa) a última falha de leitura do arquivo"""
+    with _refresh_lock:
+        if exc is None:
+            _refresh_errors.pop(path, None)
+        else:
+            _refresh_errors[path] = (mtime, f"{os.path.basename(path)}: {exc}")
+
+
+def _schedule_refresh(path, mtime, prepare, required):
+    """Dispara (uma vez por caminho) a recarga em segundo plano de uma versão nova do arquivo"""
+    with _refresh_lock:
+        failed = _refresh_errors.get(path)
+        if path in _refreshing or (failed is not None and failed[0] == mtime):
+            return
+        _refreshing.add(path)
+    threading.Thread(
+        target=_refresh, args=(path, mtime, prepare, required), name=f"refresh:{path}", daemon=True
+    ).start()
+
+
+def _refresh(path, mtime, prepare, required):
+    """
+    Lê, valida e prepara a versão nova fora do caminho das requisições e a troca
+    de uma vez. Para a tabela de métricas, o índice (e as partições) também é
+    montado antes da troca, então nenhuma sessão espera pela reconstrução.
+    Uma versão inválida é descartada e a anterior continua em uso.
+    """
+    global _store, _rollups, _partitions_mtime
+    try:
+        df = _read_table(path)
+        _validate(df, required)
+        if prepare is not None:
+            df = prepare(df)
+
+        store = ingested = rollups = None
+        if prepare is _prepare_metrics:
+            store, ingested = MetricsStore(df, presorted=True), set()
+            dir_mtime = _partitions_dir_mtime()
+            _ingest_partitions(store, ingested)
+            rollups = build_rollups(store)
+
+        with _lock:
+            _cache[path] = (mtime, df)
+            if store is not None:
+                _store = (df, store)
+                _rollups = (store, rollups)
+                _ingested.clear()
+                _ingested.update(ingested)
+                with _refresh_lock:
+                    _partitions_mtime = dir_mtime
+        _record_error(path, mtime, None)
+    except Exception as exc:
+        _record_error(path, mtime, exc)
+    finally:
+        with _refresh_lock:
+            _refreshing.discard(path)
+
+
+def get_dataset(name):
+    """
+    Retorna o dataset compartilhado ('models', 'metrics' ou 'metricas_info').
+    O DataFrame é o mesmo objeto para todas as sessões: trate-o como somente leitura.
+    'metrics' é a tabela completa do índice, incluindo as partições já ingeridas.
+    No backend SQLite a tabela de métricas não é carregada em memória: 'metrics'
+    retorna None (use get_metrics_store(), cujas consultas leem só o recorte pedido).
+    """
+    if BACKEND == "sqlite":
+        store = get_metrics_store()
+        if store is None or name == "metrics":
+            return None
+        return store.read_table(name)
+    if name == "metrics":
+        store = get_metrics_store()
+        return None if store is None else store.frame
+    return load_table(dataset_path(name), _PREPARE.get(name), REQUIRED_COLUMNS.get(name))
+
+
+def _metrics_table():
+    """Tabela de métricas carregada do arquivo principal (sem as partições)"""
+    return load_table(dataset_path("metrics"), _prepare_metrics, REQUIRED_COLUMNS["metrics"])
+
+
+def _sqlite_source():
+    """(caminho, inode) do banco; o inode muda quando o convert_data.py gera um banco novo"""
+    path = os.path.join(DATA_DIR, SQLITE_FILE)
+    try:
+        return (path, os.stat(path).st_ino)
+    except OSError:
+        return None
+
+
+def clear_cache():
+    """Descarta as tabelas e o índice em memória (a próxima leitura volta ao disco)"""
+    global _store, _rollups, _partitions_mtime
+    with _lock:
+        _cache.clear()
+        _derived.clear()
+        _ingested.clear()
+        _store = (None, None)
+        _rollups = (None, None)
+    with _refresh_lock:
+        _refresh_errors.clear()
+        _partitions_mtime = _UNSCANNED
+
+
+def data_status():
+    """
+    Estado dos dados servidos, para o indicador "dados de":
+    as_of (modificação mais recente entre os arquivos em uso), refreshing (há uma
+    versão nova sendo carregada) e error (última versão rejeitada, inclusive
+    na primeira carga, se houver).
+    """
+    if BACKEND == "sqlite":
+        source = _sqlite_source()
+        mtimes = [os.path.getmtime(source[0])] if source else []
+    else:
+        # Cópias sob os locks: a recarga em segundo plano altera os dicts ao mesmo tempo
+        with _lock:
+            mtimes = [entry[0] for entry in _cache.values()]
+    with _refresh_lock:
+        errors = [message for _, message in _refresh_errors.values()]
+        refreshing = bool(_refreshing)
+    return {
+        "as_of": datetime.fromtimestamp(max(mtimes)) if mtimes else None,
+        "refreshing": refreshing,
+        "error": errors[-1] if errors else None,
+    }
+
+
+def data_version():
+    """Versão dos dados carregados (mtimes dos arquivos em cache), usada em chaves de cache"""
+    if BACKEND == "sqlite":
+        return _sqlite_source()
+    # Cópia sob o lock: a recarga em segundo plano insere no cache ao mesmo tempo
+    with _lock:
+        items = sorted(_cache.items())
+    return tuple(entry[0] for _, entry in items)
+
+
+def _partitions_path():
+    return os.path.join(DATA_DIR, PARTITIONS_DIR)
+
+
+def _partitions_dir_mtime():
+    """st_mtime_ns do diretório de partições (muda quando um arquivo é criado ou renomeado nele)"""
+    try:
+        return os.stat(_partitions_path()).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _partition_files():
+    """
+    Arquivos de partição presentes no diretório monitorado, do mais antigo ao mais
+    novo (mtime, depois nome): na ingestão, uma chave (model_id, metric_name, date)
+    repetida entre partições fica com o valor da mais nova.
+    """
+    try:
+        entries = list(os.scandir(_partitions_path()))
+    except OSError:
+        return []
+    files = [
+        (e.stat().st_mtime, e.path) for e in entries
+        if e.is_file() and not e.name.startswith((".", "_")) and e.name.endswith((".csv", ".parquet"))
+    ]
+    return [path for _, path in sorted(files)]
+
+
+def _ingest_partitions(store, ingested=None):
+    """
+    Acrescenta ao store as partições ainda não lidas; retorna os model_id afetados.
+    ingested: conjunto das partições já incorporadas (padrão: o do índice atual)
+    """
+    ingested = _ingested if ingested is None else ingested
+    affected = set()
+    for path in _partition_files():
+        if path in ingested:
+            continue
+        affected |= store.extend(_prepare_metrics(_read_table(path)), source=path)
+        ingested.add(path)
+    return affected
+
+
+def _check_partitions():
+    """
+    Caminho das requisições: se o diretório de partições mudou desde a última
+    varredura, agenda (uma vez) a ingestão em segundo plano. Só um stat, sem
+    listar o diretório nem ler arquivos; o índice atual continua sendo servido.
+    """
+    global _partitions_mtime
+    mtime = _partitions_dir_mtime()
+    if mtime == _partitions_mtime:
+        return
+    key = _partitions_path()
+    with _refresh_lock:
+        if mtime == _partitions_mtime or key in _refreshing:
+            return
+        _partitions_mtime = mtime
+        _refreshing.add(key)
+    threading.Thread(target=_refresh_partitions, args=(mtime,), name=f"refresh:{key}", daemon=True).start()
+
+
+def _refresh_partitions(mtime):
+    """
+    Ingere as partições novas fora do caminho das requisições: lê os arquivos,
+    monta o índice com os lotes (store.extended) e recalcula os agregados e os
+    resultados derivados dos modelos afetados; só então troca tudo sob _lock.
+    No backend SQLite, a gravação no banco também acontece aqui, nunca em uma
+    requisição. Uma partição ilegível fica em data_status() e é lida de novo
+    na próxima mudança do diretório.
+    """
+    global _store, _rollups, _partitions_mtime
+    key = _partitions_path()
+    rescan = False
+    try:
+        with _lock:
+            source, store = _store
+            owner, rollups = _rollups
+            ingested = set(_ingested)
+            derived = dict(_derived)
+        if store is None:
+            return
+
+        batches = []
+        for path in _partition_files():
+            if path in ingested:
+                continue
+            try:
+                batches.append((path, _prepare_metrics(_read_table(path))))
+                _record_error(path, mtime, None)
+            except Exception as exc:
+                _record_error(path, mtime, exc)
+        if not batches:
+            return
+
+        store_new, affected = store.extended(batches)
+        if owner is store and rollups is not None:
+            rollups = rollups.update(store_new, affected)
+        else:
+            rollups = build_rollups(store_new)
+        updated = {
+            name: (version, update(value, store_new, affected), update)
+            for name, (version, value, update) in derived.items() if update is not None
+        }
+
+        with _lock:
+            if _store[1] is not store:
+                # O índice foi trocado (recarga do arquivo principal) durante a ingestão:
+                # descarta o resultado e varre de novo na próxima requisição
+                rescan = True
+                return
+            _store = (source, store_new)
+            _rollups = (store_new, rollups)
+            # Resultados calculados durante a ingestão usaram o índice antigo: são descartados
+            for name in list(_derived):
+                if _derived[name] is derived.get(name) and name in updated:
+                    _derived[name] = updated[name]
+                else:
+                    del _derived[name]
+            _ingested.update(path for path, _ in batches)
+            figure_cache.invalidate(affected)
+    except Exception as exc:
+        _record_error(key, mtime, exc)
+    finally:
+        with _refresh_lock:
+            _refreshing.discard(key)
+            if rescan:
+                _partitions_mtime = _UNSCANNED
+
+
+def _same_source(a, b):
+    if isinstance(a, tuple) or isinstance(b, tuple):
+        return a == b
+    return a is b
+
+
+def get_metrics_store():
+    """
+    Retorna o MetricsStore (tabela de métricas indexada) compartilhado pelo processo.
+    O índice é construído uma vez por versão do arquivo de métricas; partições novas
+    em PARTITIONS_DIR são ingeridas em segundo plano (ver _refresh_partitions) e o
+    índice com elas substitui o atual quando fica pronto. Os agregados por período
+    (get_rollups) são calculados junto com o índice.
+    """
+    global _store, _rollups, _partitions_mtime
+    if BACKEND == "sqlite":
+        source = _sqlite_source()
+        if source is None:
+            return None
+        build = lambda: SqlMetricsStore(source[0])
+    else:
+        source = _metrics_table()
+        if source is None:
+            return None
+        build = lambda: MetricsStore(source, presorted=True)
+
+    current, store = _store
+    if _same_source(current, source):
+        _check_partitions()
+        return store
+
+    with _lock:
+        if BACKEND != "sqlite":
+            # Uma recarga em segundo plano pode ter trocado tabela e índice enquanto
+            # esperávamos o lock: vale a versão em cache agora
+            entry = _cache.get(dataset_path("metrics"))
+            if entry is not None:
+                source = entry[1]
+                build = lambda: MetricsStore(source, presorted=True)
+        current, store = _store
+        if not _same_source(current, source):
+            store = build()
+            _ingested.clear()
+            if isinstance(store, SqlMetricsStore):
+                # O banco só é gravado pela ingestão em segundo plano (ou pelo convert_data.py)
+                _ingested.update(store.ingested_sources())
+                dir_mtime = _UNSCANNED
+            else:
+                # Primeira carga: não há índice anterior para servir enquanto as partições são lidas
+                dir_mtime = _partitions_dir_mtime()
+                _ingest_partitions(store)
+            _store = (source, store)
+            _rollups = (store, build_rollups(store))
+            with _refresh_lock:
+                _partitions_mtime = dir_mtime
+        return store
+
+
+def get_rollups():
+    """
+    Agregados por período (modules.rollups) do índice atual, compartilhados pelo
+    processo. Já vêm prontos da carga do índice e são atualizados só para os modelos
+    afetados quando partições novas são ingeridas.
+    """
+    global _rollups
+    store = get_metrics_store()
+    if store is None:
+        return None
+    owner, rollups = _rollups
+    if owner is store:
+        return rollups
+    # O índice acabou de ser trocado por outra thread: espera os agregados dele
+    with _lock:
+        owner, rollups = _rollups
+        store = _store[1]
+        if store is not None and owner is not store:
+            rollups = build_rollups(store)
+            _rollups = (store, rollups)
+        return rollups
+
+
+def cached_derived(name, build, update=None):
+    """
+    Retorna o resultado de build(store) calculado uma vez por versão dos dados e
+    compartilhado entre as sessões (ex.: agregados da carteira inteira).
+    update(valor, store, model_ids), se informado, é chamado quando partições novas
+    chegam para recalcular apenas os modelos afetados; sem ele, o resultado é descartado.
+
+    build e update recebem o store vigente (não o da sessão que os definiu) e rodam
+    sob _lock: duas sessões não calculam o mesmo resultado e nenhuma ingestão ou
+    troca de versão acontece no meio do cálculo. Retorna None sem tabela de métricas.
+    """
+    entry = _derived.get(name)
+    if entry is not None and entry[0] == data_version():
+        return entry[1]
+
+    with _lock:
+        # Outra sessão pode ter calculado o resultado enquanto esperávamos o lock
+        version = data_version()
+        entry = _derived.get(name)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        store = get_metrics_store()
+        if store is None:
+            return None
+        value = build(store)
+        _derived[name] = (version, value, update)
+        return value
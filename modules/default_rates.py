@@ -0,0 +1,160 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from modules.aggregation import add_rows, make_keys, month_dates, split_keys
+
+# -----------------------------
+# Extratos de contratos
+# -----------------------------
+# Uma linha por contrato e mês: PD estimada pelo modelo, flag de default e exposição.
+# Formatos lidos sem carregar o arquivo inteiro:
+#   .arrow/.feather: Arrow IPC sem compressão, mapeado em memória (colunas sem cópia)
+#   .npy: array estruturado com CONTRACT_DTYPE, mapeado em memória (np.load mmap_mode)
+#   .parquet: lido por row group, com o arquivo mapeado em memória
+CONTRACT_DTYPE = np.dtype([
+    ("model_id", "<i4"),
+    ("month", "<M8[M]"),
+    ("pd", "<f4"),
+    ("default", "u1"),
+    ("exposure", "<f8"),
+])
+CONTRACT_COLUMNS = list(CONTRACT_DTYPE.names)
+CONTRACT_EXTENSIONS = (".arrow", ".feather", ".npy", ".parquet")
+
+# Linhas processadas por vez (limita a memória de trabalho, não o tamanho do arquivo)
+BATCH_ROWS = 1_000_000
+
+# Somas acumuladas por (modelo, mês)
+_N, _DEFAULTS, _N_PD, _PD, _EXPOSURE, _EXPOSURE_DEFAULT, _PD_EXPOSURE = range(7)
+
+
+def contract_files(contracts_dir):
+    """Extratos de contratos do diretório, em ordem de nome; nomes iniciados por "." ou "_" são ignorados"""
+    try:
+        entries = list(os.scandir(contracts_dir))
+    except OSError:
+        return []
+    return sorted(
+        e.path for e in entries
+        if e.is_file() and not e.name.startswith((".", "_")) and e.name.endswith(CONTRACT_EXTENSIONS)
+    )
+
+
+def write_contracts(df, path, batch_rows=BATCH_ROWS):
+    """Grava um extrato de contratos em .npy (CONTRACT_DTYPE) ou Arrow IPC sem compressão"""
+    if path.endswith(".npy"):
+        array = np.empty(len(df), dtype=CONTRACT_DTYPE)
+        for name in CONTRACT_COLUMNS:
+            array[name] = df[name].to_numpy()
+        np.save(path, array)
+        return
+    table = pa.Table.from_pandas(df[CONTRACT_COLUMNS], preserve_index=False)
+    with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table, max_chunksize=batch_rows)
+
+
+def iter_batches(path, batch_rows=BATCH_ROWS):
+    """Blocos de um extrato como dict coluna -> array, sem ler o arquivo inteiro para a memória"""
+    if path.endswith(".npy"):
+        array = np.load(path, mmap_mode="r")
+        for start in range(0, len(array), batch_rows):
+            part = array[start:start + batch_rows]
+            yield {name: part[name] for name in CONTRACT_COLUMNS}
+    elif path.endswith(".parquet"):
+        for batch in pq.ParquetFile(path, memory_map=True).iter_batches(batch_size=batch_rows, columns=CONTRACT_COLUMNS):
+            yield {name: batch.column(name).to_numpy(zero_copy_only=False) for name in CONTRACT_COLUMNS}
+    else:
+        with pa.memory_map(path) as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                yield {name: batch.column(name).to_numpy(zero_copy_only=False) for name in CONTRACT_COLUMNS}
+
+
+# -----------------------------
+# Agregação por modelo e mês
+# -----------------------------
+def accumulate(sums, batch):
+    """
+    Soma um bloco às somas por (modelo, mês): contratos, defaults, contratos com PD,
+    ΣPD, exposição, exposição em default e Σ(PD x exposição).
+    """
+    keys, group = np.unique(make_keys(batch["model_id"], batch["month"]), return_inverse=True)
+    pd_ = np.asarray(batch["pd"], dtype=float)
+    has_pd = ~np.isnan(pd_)
+    pd_ = np.where(has_pd, pd_, 0)
+    default = np.asarray(batch["default"], dtype=float)
+    exposure = np.nan_to_num(np.asarray(batch["exposure"], dtype=float))
+
+    weights = [None, default, has_pd, pd_, exposure, exposure * default, pd_ * exposure]
+    totals = np.stack([np.bincount(group, w, minlength=len(keys)) for w in weights], axis=1)
+    add_rows(sums, keys.tolist(), totals)
+    return sums
+
+
+def file_sums(path, batch_rows=BATCH_ROWS):
+    """Somas de um extrato, lido bloco a bloco (executado nos processos do pool)"""
+    sums = {}
+    for batch in iter_batches(path, batch_rows):
+        accumulate(sums, batch)
+    return sums
+
+
+def default_rate_metrics(sums):
+    """
+    Tabela longa (esquema da tabela de métricas, metric_type="default") por modelo e mês:
+    taxa_default_realizada/estimada ponderadas por contrato, vol_contratos e as
+    mesmas taxas ponderadas por exposição (sufixo _exposicao).
+    A taxa estimada usa só os contratos com PD informada.
+    """
+    keys = np.array(sorted(sums), dtype=np.int64)
+    if len(keys) == 0:
+        return pd.DataFrame(columns=["model_id", "metric_name", "metric_value", "metric_type", "date"])
+    totals = np.stack([sums[k] for k in keys.tolist()])
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        metrics = {
+            "taxa_default_realizada": totals[:, _DEFAULTS] / totals[:, _N],
+            "taxa_default_estimada": totals[:, _PD] / totals[:, _N_PD],
+            "vol_contratos": totals[:, _N],
+            "taxa_default_realizada_exposicao": totals[:, _EXPOSURE_DEFAULT] / totals[:, _EXPOSURE],
+            "taxa_default_estimada_exposicao": totals[:, _PD_EXPOSURE] / totals[:, _EXPOSURE],
+        }
+
+    model_ids, months = split_keys(keys)
+    frames = []
+    for name, values in metrics.items():
+        valid = np.isfinite(values)
+        frames.append(pd.DataFrame({
+            "model_id": model_ids[valid],
+            "metric_name": name,
+            "metric_value": np.round(values[valid], 6),
+            "metric_type": "default",
+            "date": month_dates(months[valid]),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def aggregate_default_rates(contracts_dir, workers=None, batch_rows=BATCH_ROWS, progress=print):
+    """
+    Taxas de default realizadas x estimadas por modelo e mês a partir dos extratos de
+    contratos em contracts_dir. Cada extrato é mapeado em memória e reduzido bloco a
+    bloco (bincount por modelo e mês) em um processo do pool; só as somas voltam.
+    """
+    paths = contract_files(contracts_dir)
+    if not paths:
+        raise FileNotFoundError(f"nenhum extrato de contratos em {contracts_dir}")
+
+    sums = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(file_sums, path, batch_rows) for path in paths]
+        for done, future in enumerate(as_completed(futures), start=1):
+            partial = future.result()
+            add_rows(sums, partial.keys(), partial.values())
+            progress(f"[{done}/{len(paths)}] extratos agregados")
+    return default_rate_metrics(sums)
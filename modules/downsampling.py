@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+
+
+def _as_float(x):
+    """Eixo x numérico (datas viram nanossegundos) para o cálculo de áreas"""
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype("datetime64[ns]").astype(np.int64).astype(float)
+    return x.astype(float)
+
+
+def _buckets(n, n_buckets):
+    """Balde de cada um dos pontos internos 1..n-2 (o primeiro e o último ficam sempre)"""
+    inner = np.arange(n - 2)
+    return inner * n_buckets // (n - 2)
+
+
+def _group_key(bucket, classes):
+    """Chave de seleção: o balde, ou (balde, classe) para escolher um ponto de cada classe por balde"""
+    if classes is None:
+        return bucket
+    classes = np.asarray(classes)[1:-1].astype(np.int64)
+    return bucket * (int(classes.max(initial=0)) + 1) + classes
+
+
+def _last_per_bucket(bucket, score):
+    """Índice (entre os pontos internos) de maior score em cada grupo"""
+    order = np.lexsort((score, bucket))
+    last = np.flatnonzero(np.diff(bucket[order], append=bucket[order][-1] + 1))
+    return order[last]
+
+
+def minmax_indices(y, n_out, classes=None):
+    """
+    Min-max por baldes: mantém o primeiro e o último ponto e, em cada um dos
+    (n_out - 2) / 2 baldes, o menor e o maior valor. Preserva picos e vales.
+    classes: ver downsample()
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    n_buckets = max((n_out - 2) // 2, 1)
+    bucket = _group_key(_buckets(n, n_buckets), classes)
+    values = np.where(np.isnan(y[1:-1]), -np.inf, y[1:-1])
+    highest = _last_per_bucket(bucket, values)
+    lowest = _last_per_bucket(bucket, -np.where(np.isnan(y[1:-1]), np.inf, y[1:-1]))
+    return np.unique(np.concatenate(([0, n - 1], highest + 1, lowest + 1)))
+
+
+def lttb_indices(x, y, n_out, classes=None):
+    """
+    Largest-Triangle-Three-Buckets vetorizado: em cada balde fica o ponto que forma
+    o maior triângulo com a média do balde anterior e a média do balde seguinte.
+    (O LTTB clássico usa o ponto escolhido no balde anterior, o que exige um laço
+    sequencial; com a média, todos os baldes são resolvidos de uma vez.)
+    classes: ver downsample()
+    """
+    x = _as_float(x)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    n_buckets = max(n_out - 2, 1)
+    bucket = _buckets(n, n_buckets)
+    xi, yi = x[1:-1], np.nan_to_num(y[1:-1])
+
+    # Médias de cada balde; os vizinhos das pontas são o primeiro e o último ponto
+    counts = np.bincount(bucket, minlength=n_buckets)
+    mean_x = np.bincount(bucket, xi, minlength=n_buckets) / np.maximum(counts, 1)
+    mean_y = np.bincount(bucket, yi, minlength=n_buckets) / np.maximum(counts, 1)
+    prev_x = np.concatenate(([x[0]], mean_x[:-1]))[bucket]
+    prev_y = np.concatenate(([np.nan_to_num(y[0])], mean_y[:-1]))[bucket]
+    next_x = np.concatenate((mean_x[1:], [x[-1]]))[bucket]
+    next_y = np.concatenate((mean_y[1:], [np.nan_to_num(y[-1])]))[bucket]
+
+    area = np.abs((prev_x - next_x) * (yi - prev_y) - (prev_x - xi) * (next_y - prev_y))
+    chosen = _last_per_bucket(_group_key(bucket, classes), area)
+    return np.unique(np.concatenate(([0, n - 1], chosen + 1)))
+
+
+def downsample(x, y, max_points, method="lttb", keep=None, classes=None):
+    """
+    Índices (ordenados) dos pontos a desenhar de uma série com no máximo max_points pontos.
+    method: "lttb" ou "minmax"
+    keep: máscara booleana de pontos que sempre permanecem (ex.: cruzamentos de
+        threshold); o orçamento do algoritmo é reduzido para compensar. Se os
+        próprios pontos de keep não couberem, fica uma amostra uniforme deles
+    classes: inteiros pequenos por ponto (ex.: status bom/atenção/alerta); cada balde
+        mantém um ponto de cada classe presente nele, então nenhuma classe some
+        do gráfico. O número de baldes é dividido pelo de classes presentes para
+        que o total continue dentro de max_points
+    Séries que já cabem no orçamento são devolvidas inteiras.
+    """
+    n = len(y)
+    if max_points is None or n <= max(max_points, 3):
+        return np.arange(n)
+
+    kept = np.flatnonzero(keep) if keep is not None else np.array([], dtype=np.int64)
+    budget = max_points - len(kept)
+    if budget < 3:
+        # Pontos obrigatórios demais (série ruidosa em torno do threshold): mantém
+        # uma fração uniforme deles, além do primeiro e do último, dentro do orçamento
+        if len(kept) > max_points - 2:
+            kept = kept[np.linspace(0, len(kept) - 1, max(max_points - 2, 1)).astype(np.int64)]
+        return np.union1d(kept, [0, n - 1])
+
+    if classes is not None:
+        n_classes = len(np.unique(np.asarray(classes)[1:-1]))
+        # Até n_classes pontos por balde (minmax: 2 x n_classes) além das duas pontas
+        budget = (budget - 2) // max(n_classes, 1) + 2
+    if method == "minmax":
+        idx = minmax_indices(y, budget, classes)
+    else:
+        idx = lttb_indices(x, y, budget, classes)
+    return np.union1d(idx, kept)
+
+
+def status_changes(status):
+    """Máscara dos pontos em que o status muda (os dois lados de cada cruzamento de threshold)"""
+    status = np.asarray(status)
+    change = np.zeros(len(status), dtype=bool)
+    if len(status) > 1:
+        diff = status[1:] != status[:-1]
+        change[1:] |= diff
+        change[:-1] |= diff
+    return change
+
+
+def downsample_frame(df, y, max_points, x="date", method="lttb", keep=None):
+    """Linhas de df selecionadas por downsample() sobre as colunas x e y"""
+    if max_points is None or len(df) <= max_points:
+        return df
+    values = pd.to_numeric(df[y], errors="coerce").to_numpy(dtype=float)
+    return df.iloc[downsample(df[x].to_numpy(), values, max_points, method, keep)]
@@ -0,0 +1,141 @@
+import json
+import threading
+from collections import OrderedDict
+
+from plotly.basedatatypes import BaseFigure
+
+# -----------------------------
+# Limites do cache de figuras
+# -----------------------------
+MAX_ENTRIES = 2_000
+MAX_BYTES = 256 * 1024 * 1024  # tamanho total do JSON das figuras em cache
+
+
+class SerializedFigure(BaseFigure):
+    """
+    Figura guardada no cache já serializada (JSON): imutável, compartilhada entre
+    as sessões sem que uma altere a figura de outra, e com tamanho exato.
+    É aceita diretamente por st.plotly_chart: to_dict() devolve um dict novo a
+    cada rerun a partir do JSON, sem reconstruir nem revalidar os objetos Plotly
+    (um dict comum seria revalidado pelo Streamlit como go.Figure a cada rerun).
+    """
+
+    def __init__(self, spec):
+        # Sem BaseFigure.__init__: não há objetos de trace, só o JSON
+        self._spec = spec
+
+    def to_dict(self):
+        return json.loads(self._spec)
+
+    def to_plotly_json(self):
+        return self.to_dict()
+
+    def to_json(self, *args, **kwargs):
+        return self._spec
+
+    def __len__(self):
+        return len(self._spec)
+
+    def __eq__(self, other):
+        return isinstance(other, SerializedFigure) and other._spec == self._spec
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"SerializedFigure({len(self._spec)} bytes)"
+
+
+class FigureCache:
+    """
+    Cache LRU de figuras Plotly compartilhado por todas as sessões do processo.
+
+    A chave é uma tupla (builder, model_id, ...demais entradas do gráfico...,
+    versão dos dados); em gráficos de vários modelos, model_id é a tupla dos ids.
+    Um rerun que não altera nenhuma dessas entradas reaproveita a figura já
+    serializada (SerializedFigure) em vez de reconstruí-la e serializá-la de novo.
+    O tamanho de cada entrada é o do JSON, e as menos usadas são descartadas ao
+    exceder os limites.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # chave -> (SerializedFigure, bytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(self, key, build):
+        """
+        Retorna a figura da chave como SerializedFigure, construindo-a com build()
+        (que retorna um go.Figure) e serializando-a uma única vez se não estiver no cache.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # Construção fora do lock para não bloquear outras sessões
+        fig = SerializedFigure(build().to_json())
+        size = len(fig)
+        if size > self.max_bytes:
+            return fig
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (fig, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+        return fig
+
+    def invalidate(self, model_ids=None):
+        """Remove as figuras dos modelos informados (ou todas, se model_ids for None)"""
+        with self._lock:
+            if model_ids is None:
+                self._entries.clear()
+                self._bytes = 0
+                return
+            model_ids = {int(m) for m in model_ids}
+            stale = [
+                k for k in self._entries
+                if (not model_ids.isdisjoint(k[1]) if isinstance(k[1], tuple) else k[1] in model_ids)
+            ]
+            for key in stale:
+                _, size = self._entries.pop(key)
+                self._bytes -= size
+
+    def stats(self):
+        """Resumo de uso do cache"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# Instância compartilhada pelo processo
+figure_cache = FigureCache()
+
+
+def cached_figure(builder, model_id, key, build):
+    """
+    Atalho para figure_cache.get_or_build com a chave (nome do builder, model_id, *key).
+    model_id pode ser uma lista de ids (gráfico de vários modelos): a figura é
+    descartada quando qualquer um deles recebe dados novos.
+    key deve conter todas as demais entradas que alteram o gráfico, incluindo a versão dos dados.
+    """
+    if isinstance(model_id, (list, tuple)):
+        model_id = tuple(sorted(int(m) for m in model_id))
+    else:
+        model_id = int(model_id)
+    return figure_cache.get_or_build((builder.__name__, model_id, *key), build)
@@ -1,16 +1,25 @@
-import matplotlib.pyplot as plt
-import plotly.express as px
+import numpy as np
 import pandas as pd
 
+from modules.downsampling import downsample, downsample_frame, status_changes
+from modules.metrics import STATUS_ALERT, STATUS_ATTENTION, classify_thresholds
+
+# plotly.express e matplotlib são importados dentro das funções que os usam:
+# importar este módulo (todas as páginas o fazem) não carrega nenhum backend gráfico.
+
 
 # ----------------------------------
 # 1. Gráfico de taxas de default
 # ----------------------------------
-def plot_pd_error(df_pivot, yaxis_title, yaxis_range, ticksuffix="", height=350):
+def plot_pd_error(df_pivot, yaxis_title, yaxis_range, ticksuffix="", height=350, max_points=None):
     """
     Gráfico de linha para erro de PD.
     df_pivot: DataFrame com colunas ['date', 'erro_pd']
+    max_points: orçamento de pontos; séries maiores são reduzidas (LTTB)
     """
+    import plotly.express as px
+
+    df_pivot = downsample_frame(df_pivot, "erro_pd", max_points)
     fig = px.line(
         df_pivot,
         x="date",
@@ -42,11 +51,21 @@ def plot_pd_error(df_pivot, yaxis_title, yaxis_range, ticksuffix="", height=350)
 # ----------------------------------
 # 2. Gráfico de erro PD
 # ----------------------------------
-def plot_default_rates(df_pivot, height=350):
+def plot_default_rates(df_pivot, height=350, max_points=None):
     """
     Gráfico de linha para taxas de default.
     df_pivot: DataFrame pivotado com colunas ['date', 'taxa_default_realizada', 'taxa_default_estimada']
+    max_points: orçamento de pontos por série; mantém a união dos pontos escolhidos (LTTB) em cada taxa
     """
+    import plotly.express as px
+
+    if max_points is not None and len(df_pivot) > max_points:
+        x = df_pivot["date"].to_numpy()
+        idx = np.union1d(
+            downsample(x, df_pivot["taxa_default_realizada"].to_numpy(dtype=float), max_points),
+            downsample(x, df_pivot["taxa_default_estimada"].to_numpy(dtype=float), max_points),
+        )
+        df_pivot = df_pivot.iloc[idx]
     fig = px.line(
         df_pivot,
         x="date",
@@ -86,38 +105,37 @@ def plot_metric_interactive(
     default_color="blue",
     marker_size=10,
     line_color="blue",
-    height=350
+    height=350,
+    max_points=None
 ):
     """
-    df: DataFrame com colunas ['date', 'metric_value']
+    df: DataFrame com colunas ['date', 'metric_value']; se vier agregado por período
+        (colunas 'min' e 'max', ver modules/rollups.py), a faixa mín–máx é sombreada
     metric: nome da métrica
     thresholds: dict com 'attention' e 'alert' (valores numéricos)
     direction: "higher_better", "lower_better", "neutral"
+    max_points: orçamento de pontos; séries maiores são reduzidas (LTTB), mantendo
+        sempre os pontos em que a série cruza um threshold e, em cada balde, um
+        ponto de cada status presente
     """
-    df = df.copy()
-    df["metric_value"] = pd.to_numeric(df["metric_value"], errors="coerce")
+    import plotly.express as px
+
+    if not pd.api.types.is_numeric_dtype(df["metric_value"]):
+        df = df.assign(metric_value=pd.to_numeric(df["metric_value"], errors="coerce"))
 
     # --- Definir cor dos pontos ---
-    colors = []
-    for val in df["metric_value"]:
-        if direction == "neutral" or thresholds is None:
-            colors.append(default_color)
-        elif direction == "higher_better":
-            if thresholds.get("alert") is not None and val < thresholds["alert"]:
-                colors.append("red")
-            elif thresholds.get("attention") is not None and val < thresholds["attention"]:
-                colors.append("orange")
-            else:
-                colors.append(default_color)
-        elif direction == "lower_better":
-            if thresholds.get("alert") is not None and val > thresholds["alert"]:
-                colors.append("red")
-            elif thresholds.get("attention") is not None and val > thresholds["attention"]:
-                colors.append("orange")
-            else:
-                colors.append(default_color)
-        else:
-            colors.append(default_color)
+    thresholds = thresholds or {}
+    status = classify_thresholds(
+        df["metric_value"].to_numpy(), thresholds.get("attention"), thresholds.get("alert"), direction
+    )
+
+    # --- Reduzir a série ao orçamento de pontos ---
+    if max_points is not None and len(df) > max_points:
+        # Os cruzamentos de threshold ficam sempre; o LTTB usa o restante do orçamento
+        idx = downsample(df["date"].to_numpy(), df["metric_value"].to_numpy(), max_points,
+                         keep=status_changes(status), classes=status)
+        df, status = df.iloc[idx], status[idx]
+    colors = np.array([default_color, "orange", "red"], dtype=object)[status]
 
     # --- Linha principal ---
     fig = px.line(
@@ -127,7 +145,15 @@ def plot_metric_interactive(
         markers=True,
         labels={"metric_value": metric, "date": "Data"}
     )
-    fig.update_traces(marker=dict(color=colors, size=marker_size), line=dict(color=line_color))
+    fig.update_traces(marker=dict(color=colors.tolist(), size=marker_size), line=dict(color=line_color))
+
+    # --- Faixa mín–máx dos dados agregados ---
+    if "min" in df and "max" in df:
+        fig.add_scatter(x=df["date"], y=df["max"], mode="lines", line=dict(width=0),
+                        hoverinfo="skip", showlegend=False)
+        fig.add_scatter(x=df["date"], y=df["min"], mode="lines", line=dict(width=0),
+                        fill="tonexty", fillcolor="rgba(0, 0, 255, 0.1)",
+                        hoverinfo="skip", name="Mín–Máx do período")
 
     # --- Adicionar thresholds ---
     if thresholds:
@@ -164,7 +190,84 @@ def plot_metric_interactive(
 
 
 # ----------------------------------
-# 4. Gráfico estático (matplotlib)
+# 4. Comparação entre modelos (WebGL)
+# ----------------------------------
+def _threshold_bands(attention, alert, direction, low, high):
+    """Faixas (y0, y1, cor, rótulo) de atenção e alerta entre os limites low e high do eixo"""
+    bands = []
+    if direction == "higher_better":
+        if alert is not None:
+            bands.append((low, alert, "red", "Alerta"))
+        if attention is not None:
+            bands.append((alert if alert is not None else low, attention, "orange", "Atenção"))
+    elif direction == "lower_better":
+        if attention is not None:
+            bands.append((attention, alert if alert is not None else high, "orange", "Atenção"))
+        if alert is not None:
+            bands.append((alert, high, "red", "Alerta"))
+    return bands
+
+
+def plot_metric_comparison(df, metric, names=None, thresholds=None, direction="neutral", height=500):
+    """
+    Séries de uma métrica de vários modelos no mesmo gráfico, uma trace Scattergl
+    (WebGL) por modelo: o navegador continua responsivo com centenas de séries.
+    df: DataFrame com colunas ['model_id', 'date', 'metric_value'], ordenado por (model_id, date)
+    names: mapeamento model_id -> nome exibido na legenda (dict ou Series)
+    thresholds: dict com 'attention' e 'alert'; as faixas de atenção e alerta são
+        desenhadas uma única vez, como retângulos de fundo, do lado dado por direction
+    """
+    import plotly.graph_objects as go
+
+    values = pd.to_numeric(df["metric_value"], errors="coerce").to_numpy(dtype=float)
+    model_ids = df["model_id"].to_numpy()
+    dates = df["date"].to_numpy()
+    if names is None:
+        names = {}
+
+    # Cada modelo ocupa um bloco contíguo de linhas
+    change = np.flatnonzero(model_ids[1:] != model_ids[:-1]) + 1
+    starts = np.concatenate(([0], change)) if len(df) else change
+    stops = np.concatenate((change, [len(df)])) if len(df) else change
+    # Traces como dicts: a figura valida tudo de uma vez (~4x mais rápido que
+    # um go.Scattergl por modelo com centenas de séries)
+    fig = go.Figure(data=[
+        dict(
+            type="scattergl", x=dates[i:j], y=values[i:j], mode="lines",
+            name=str(names.get(model_ids[i], model_ids[i])), hovertemplate="%{x|%m/%Y}: %{y:.4f}",
+        )
+        for i, j in zip(starts.tolist(), stops.tolist())
+    ])
+
+    # --- Faixas de threshold (uma vez para todas as séries) ---
+    thresholds = {k: v for k, v in (thresholds or {}).items() if v is not None and v == v}
+    finite = values[np.isfinite(values)]
+    if thresholds and len(finite):
+        bounds = [finite.min(), finite.max(), *thresholds.values()]
+        pad = (max(bounds) - min(bounds)) * 0.05 or 0.05
+        low, high = min(bounds) - pad, max(bounds) + pad
+        for y0, y1, color, label in _threshold_bands(
+            thresholds.get("attention"), thresholds.get("alert"), direction, low, high
+        ):
+            fig.add_hrect(y0=y0, y1=y1, fillcolor=color, opacity=0.08, line_width=0, layer="below",
+                          annotation_text=label, annotation_position="top left")
+        fig.update_yaxes(range=[low, high])
+
+    # --- Layout final ---
+    fig.update_layout(
+        xaxis_title="Data",
+        yaxis_title=metric,
+        legend_title="Modelo",
+        template="plotly_white",
+        hovermode="closest",
+        height=height
+    )
+
+    return fig
+
+
+# ----------------------------------
+# 5. Gráfico estático (matplotlib)
 # ----------------------------------
 def plot_metric(
     df,
@@ -175,9 +278,28 @@ def plot_metric(
     line_width=2,
     marker_size=6,
     grid=True,
-    highlight_thresholds=True
+    highlight_thresholds=True,
+    direction="lower_better",
+    ax=None
 ):
-    fig, ax = plt.subplots(figsize=figsize)
+    """
+    Versão estática (matplotlib) do gráfico de métrica.
+    ax: eixo existente a reaproveitar (é limpo antes de desenhar); sem ele, uma
+        nova figura de tamanho figsize é criada. Exportações em lote passam o mesmo
+        eixo para todos os modelos em vez de criar uma figura por gráfico; nesse
+        caso o layout (margens) da figura fica a cargo de quem a criou.
+    """
+    created = ax is None
+    if created:
+        import matplotlib.pyplot as plt
+
+        fig, ax = plt.subplots(figsize=figsize)
+    else:
+        ax.clear()
+        fig = ax.figure
+
+    if not pd.api.types.is_numeric_dtype(df["metric_value"]):
+        df = df.assign(metric_value=pd.to_numeric(df["metric_value"], errors="coerce"))
 
     # --- Plot da métrica ---
     ax.plot(
@@ -210,23 +332,21 @@ def plot_metric(
     ax.spines['left'].set_visible(False)
     ax.spines['bottom'].set_color('#AAAAAA')
 
-    # --- Destacar pontos acima dos thresholds ---
+    # --- Destacar pontos que ultrapassam os thresholds ---
     if highlight_thresholds and thresholds:
-        alert_value = thresholds.get("alert", None)
-        if alert_value:
-            exceed = df[df["metric_value"] > alert_value]
-            ax.scatter(exceed["date"], exceed["metric_value"], color="red", s=50, zorder=5)
-
-        attention_value = thresholds.get("attention", None)
-        if attention_value:
-            exceed = df[
-                (df["metric_value"] > attention_value) &
-                (alert_value is None or df["metric_value"] <= alert_value)
-            ]
-            ax.scatter(exceed["date"], exceed["metric_value"], color="orange", s=50, zorder=5)
+        status = classify_thresholds(
+            df["metric_value"].to_numpy(),
+            thresholds.get("attention"), thresholds.get("alert"), direction
+        )
+        for level, color in [(STATUS_ALERT, "red"), (STATUS_ATTENTION, "orange")]:
+            exceed = df[status == level]
+            ax.scatter(exceed["date"], exceed["metric_value"], color=color, s=50, zorder=5)
 
     # --- Ajuste do eixo x ---
-    plt.xticks(rotation=45, ha="right", fontsize=10)
+    ax.tick_params(axis="x", labelsize=10)
+    for label in ax.get_xticklabels():
+        label.set_rotation(45)
+        label.set_horizontalalignment("right")
 
     # --- Legenda fora do gráfico ---
     handles, labels = ax.get_legend_handles_labels()
@@ -238,12 +358,11 @@ def plot_metric(
         bbox_to_anchor=(1.05, 1), loc='upper left'
     )
 
-    plt.tight_layout()
+    if created:
+        fig.tight_layout()
     return fig
 
 
-import plotly.express as px
-
 def plot_n_contratos(df_contratos, date_column, count_column, height=400):
     """
     Plota o número de contratos por data.
@@ -259,6 +378,8 @@ def plot_n_contratos(df_contratos, date_column, count_column, height=400):
     height : int
         Altura do gráfico.
     """
+    import plotly.express as px
+
     fig = px.bar(
         df_contratos,
         x=date_column,
@@ -1,3 +1,76 @@
+import numpy as np
+import pandas as pd
+
+# Status de uma métrica em relação aos thresholds de atenção/alerta
+STATUS_GOOD, STATUS_ATTENTION, STATUS_ALERT = 0, 1, 2
+STATUS_LABELS = ["Bom", "Atenção", "Alerta"]
+
+
+# Métricas de taxa de default (realizada x estimada pelo modelo)
+DEFAULT_RATE_METRICS = ["taxa_default_realizada", "taxa_default_estimada"]
+
+
+def compute_default_rates(df, vol_carteira):
+    """
+    Taxas de default e erro de PD de um ou vários modelos, com um único pivot.
+    df: tabela longa com model_id, metric_name, date e metric_value
+        (outras métricas são ignoradas)
+    vol_carteira: Series model_id -> volume de carteira, ou um escalar
+    Retorna um dict de arrays contíguos, uma posição por (model_id, date) em ordem:
+        model_id, date, realizada, estimada (frações), erro_pp (estimada - realizada,
+        em pontos percentuais) e erro_brl (mesma diferença x vol_carteira, em R$);
+    e em "latest" os mesmos campos com uma posição por modelo (última data de cada um).
+    """
+    rows = df[df["metric_name"].isin(DEFAULT_RATE_METRICS)]
+    rows = rows.assign(metric_value=pd.to_numeric(rows["metric_value"], errors="coerce"))
+    pivot = rows.pivot(index=["model_id", "date"], columns="metric_name", values="metric_value")
+    pivot = pivot.reindex(columns=DEFAULT_RATE_METRICS)
+
+    values = pivot.to_numpy(dtype=float, na_value=np.nan)
+    model_ids = pivot.index.get_level_values("model_id").to_numpy()
+    if np.ndim(vol_carteira) == 0:
+        vol = np.full(len(model_ids), vol_carteira, dtype=float)
+    else:
+        vol = vol_carteira.reindex(model_ids).to_numpy(dtype=float)
+
+    realizada = np.ascontiguousarray(values[:, 0])
+    estimada = np.ascontiguousarray(values[:, 1])
+    diff = estimada - realizada
+    rates = {
+        "model_id": model_ids,
+        "date": pivot.index.get_level_values("date").to_numpy(),
+        "realizada": realizada,
+        "estimada": estimada,
+        "erro_pp": diff * 100,
+        "erro_brl": diff * vol,
+    }
+
+    # Última data de cada modelo: a linha anterior a cada troca de model_id
+    last = np.flatnonzero(np.append(model_ids[1:] != model_ids[:-1], True)) if len(model_ids) else model_ids
+    rates["latest"] = {name: column[last] for name, column in rates.items()}
+    return rates
+
+
+def default_rates_frame(rates):
+    """Taxas em porcentagem no formato de plot_default_rates: date, taxa_default_realizada, taxa_default_estimada"""
+    return pd.DataFrame({
+        "date": rates["date"],
+        "taxa_default_realizada": rates["realizada"] * 100,
+        "taxa_default_estimada": rates["estimada"] * 100,
+    })
+
+
+def error_frame(rates, error_view="Taxa (%)"):
+    """Erro de PD em % ou R$ no formato de plot_pd_error: (df, título do eixo, faixa do eixo, sufixo)"""
+    df = default_rates_frame(rates)
+    if error_view == "Taxa (%)":
+        df["erro_pd"] = rates["erro_pp"]
+        return df, "Erro de PD (%)", [-5, 5], "%"
+    else:
+        df["erro_pd"] = rates["erro_brl"]
+        return df, "Erro de PD (R$)", None, ""
+
+
 def prepare_default_rates(df):
     """Converte taxas para porcentagem"""
     df_pivot = df.pivot(index="date", columns="metric_name", values="metric_value").reset_index()
@@ -16,4 +89,32 @@ def calculate_error(df, vol, error_view="Taxa (%)"):
         return df_pivot, "Erro de PD (%)", [-5, 5], "%"
     else:
         df_pivot["erro_pd"] = (df_pivot["taxa_default_estimada"] - df_pivot["taxa_default_realizada"]) * vol
-        return df_pivot, "Erro de PD (R$)", None, ""
\ No newline at end of file
+        return df_pivot, "Erro de PD (R$)", None, ""
+
+
+def classify_thresholds(values, attention=None, alert=None, direction="neutral"):
+    """
+    Classifica valores como bom (0), atenção (1) ou alerta (2), de forma vetorizada.
+    values: array de valores; a comparação usa o dtype deles (float32 ou float64;
+        outros tipos viram float64). NaN é classificado como bom
+    attention, alert: thresholds escalares ou arrays do mesmo tamanho de values;
+        None/NaN significam threshold ausente
+    direction: "higher_better", "lower_better" ou "neutral" (escalar ou array)
+    """
+    # Só os thresholds são convertidos para o dtype dos valores: dados float32
+    # (tabela compacta) são comparados em float32, e 0.70 armazenado não cai
+    # abaixo de um threshold de 0.70; dados float64 mantêm a precisão total
+    values = np.asarray(values)
+    if values.dtype.kind != "f":
+        values = values.astype(np.float64)
+    attention = np.asarray(np.nan if attention is None else attention, dtype=values.dtype)
+    alert = np.asarray(np.nan if alert is None else alert, dtype=values.dtype)
+    direction = np.asarray(direction)
+
+    # Comparações com NaN são falsas: threshold ausente nunca dispara
+    higher = direction == "higher_better"
+    lower = direction == "lower_better"
+    is_alert = (higher & (values < alert)) | (lower & (values > alert))
+    is_attention = (higher & (values < attention)) | (lower & (values > attention))
+
+    return np.select([is_alert, is_attention], [STATUS_ALERT, STATUS_ATTENTION], STATUS_GOOD).astype(np.int8)
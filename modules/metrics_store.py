@@ -0,0 +1,273 @@
+import copy
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Ordem das linhas exigida pelo índice
+SORT_KEYS = ["model_id", "metric_name", "date"]
+
+
+def last_per_key(df):
+    """
+    Remove as chaves (model_id, metric_name, date) repetidas de uma tabela
+    ordenada por SORT_KEYS de forma estável: fica a última linha de cada chave,
+    ou seja, o valor gravado por último (ex.: um mês recalculado em uma partição nova).
+    """
+    if len(df) < 2:
+        return df
+    same = np.ones(len(df) - 1, dtype=bool)
+    for column in SORT_KEYS:
+        values = df[column]
+        values = values.cat.codes.to_numpy() if isinstance(values.dtype, pd.CategoricalDtype) else values.to_numpy()
+        same &= values[1:] == values[:-1]
+    if not same.any():
+        return df
+    return df[np.append(~same, True)].reset_index(drop=True)
+
+
+class _Segment:
+    """Bloco da tabela ordenado por SORT_KEYS, com o intervalo de linhas de cada grupo"""
+
+    def __init__(self, df):
+        self.df = df
+        self.dates = df["date"].to_numpy()
+
+        # Fronteiras de cada grupo (model_id, metric_name) na tabela ordenada
+        model_ids = df["model_id"].to_numpy()
+        names = df["metric_name"].to_numpy()
+        n = len(df)
+        if n:
+            change = np.flatnonzero((model_ids[1:] != model_ids[:-1]) | (names[1:] != names[:-1])) + 1
+            starts = np.concatenate(([0], change))
+            stops = np.concatenate((change, [n]))
+        else:
+            starts = stops = np.array([], dtype=int)
+
+        self.starts = starts
+        self.stops = stops
+        self.offsets = {}
+        for start, stop in zip(starts.tolist(), stops.tolist()):
+            self.offsets[(int(model_ids[start]), names[start])] = (start, stop)
+
+    def bounds(self, key, start=None, end=None):
+        """Intervalo [início, fim) de linhas do grupo key dentro do período [start, end]"""
+        i, j = self.offsets.get(key, (0, 0))
+        if i == j:
+            return 0, 0
+        dates = self.dates[i:j]
+        lo = np.searchsorted(dates, np.datetime64(pd.Timestamp(start)), side="left") if start is not None else 0
+        hi = np.searchsorted(dates, np.datetime64(pd.Timestamp(end)), side="right") if end is not None else j - i
+        return i + lo, i + hi
+
+    def slice(self, key, start=None, end=None):
+        """Cópia das linhas do grupo key dentro do período [start, end]"""
+        i, j = self.bounds(key, start, end)
+        # Cópia explícita (poucas linhas): a página pode alterar o resultado sem
+        # tocar a tabela compartilhada, com ou sem Copy-on-Write no pandas
+        return self.df.iloc[i:j].copy()
+
+
+class MetricsStore:
+    """
+    Acesso indexado à tabela longa de métricas.
+
+    A tabela é ordenada uma única vez por (model_id, metric_name, date) e cada par
+    (model_id, metric_name) é mapeado para o intervalo [início, fim) de linhas que
+    ocupa. Uma consulta é então uma busca no dicionário seguida de busca binária
+    nas datas do intervalo: O(log n + k), independente do número de modelos.
+
+    A coluna date deve estar em datetime64. Se a tabela já vier ordenada por
+    SORT_KEYS e sem chaves repetidas (presorted=True), ela é usada como está, sem
+    cópia: frame é a tabela compartilhada (somente leitura); as consultas por
+    série devolvem cópias.
+
+    Novos lotes (ex.: partição mensal) entram com extend() como segmentos
+    indexados à parte, sem reordenar nem copiar a tabela existente: as consultas
+    por série leem todos os segmentos. Uma chave (model_id, metric_name, date)
+    presente em mais de um segmento vale o valor do lote mais recente. As leituras
+    da tabela inteira (frame, group_bounds) fundem os segmentos em um só (cópia e
+    ordenação da tabela), uma vez por lote de extend(); o resultado vale até o
+    próximo extend().
+    """
+
+    def __init__(self, df, presorted=False):
+        if not presorted:
+            df = last_per_key(df.sort_values(SORT_KEYS, kind="stable", ignore_index=True))
+
+        # Tupla imutável: leitores usam o retrato que pegaram; extend() e _compact()
+        # trocam a tupla sob _lock, então nenhum segmento se perde entre os dois
+        self._segments = (_Segment(df),)
+        self._lock = threading.Lock()
+        self._model_metrics = {}
+        self._register(self._segments[0])
+
+        self.date_min = df["date"].min()
+        self.date_max = df["date"].max()
+
+    def _register(self, segment):
+        """Atualiza o catálogo de métricas por modelo com os grupos do segmento"""
+        for model_id, name in segment.offsets:
+            names = self._model_metrics.setdefault(model_id, [])
+            if name not in names:
+                names.append(name)
+
+    def extend(self, df, source=None):
+        """
+        Acrescenta um lote de linhas como novo segmento indexado; as chaves que já
+        existiam passam a valer o valor do lote (a última linha, se repetidas nele).
+        Retorna o conjunto de model_id afetados. source identifica o lote e só é
+        usado por backends persistentes (ver SqlMetricsStore).
+        """
+        if df.empty:
+            return set()
+        df = last_per_key(df.sort_values(SORT_KEYS, kind="stable", ignore_index=True))
+        segment = _Segment(df)
+        with self._lock:
+            self._segments = self._segments + (segment,)
+            self._register(segment)
+            dates = df["date"]
+            self.date_min = dates.min() if pd.isna(self.date_min) else min(self.date_min, dates.min())
+            self.date_max = dates.max() if pd.isna(self.date_max) else max(self.date_max, dates.max())
+        return {model_id for model_id, _ in segment.offsets}
+
+    def extended(self, batches):
+        """
+        Novo MetricsStore com os lotes [(source, df)] acrescentados, sem alterar este
+        (as sessões continuam lendo o atual até a troca): os segmentos, imutáveis,
+        são compartilhados. Retorna (store, model_id afetados).
+        """
+        store = copy.copy(self)
+        store._lock = threading.Lock()
+        store._model_metrics = {model_id: list(names) for model_id, names in self._model_metrics.items()}
+        affected = set()
+        for source, df in batches:
+            affected |= store.extend(df, source=source)
+        return store, affected
+
+    def _compact(self):
+        """
+        Funde os segmentos em um só (usado apenas por operações sobre a tabela inteira).
+        Feito sob _lock: um extend() concorrente espera a fusão e entra depois dela.
+        """
+        segments = self._segments
+        if len(segments) == 1:
+            return segments[0]
+        with self._lock:
+            segments = self._segments
+            if len(segments) > 1:
+                df = pd.concat([s.df for s in segments], ignore_index=True)
+                # Categóricos com categorias diferentes entre segmentos voltam de concat como texto
+                first = segments[0].df
+                for column in df.columns:
+                    if isinstance(first[column].dtype, pd.CategoricalDtype) and not isinstance(df[column].dtype, pd.CategoricalDtype):
+                        df[column] = df[column].astype("category")
+                # Ordenação estável na ordem dos segmentos: a chave repetida fica com o lote mais recente
+                df = last_per_key(df.sort_values(SORT_KEYS, kind="stable", ignore_index=True))
+                self._segments = (_Segment(df),)
+            return self._segments[0]
+
+    @property
+    def frame(self):
+        """Tabela completa, ordenada por (model_id, metric_name, date)"""
+        return self._compact().df
+
+    def group_bounds(self):
+        """Arrays (início, fim) das linhas de cada par (model_id, metric_name), na ordem de frame"""
+        segment = self._compact()
+        return segment.starts, segment.stops
+
+    def iter_blocks(self, models_per_block=None):
+        """
+        A tabela em blocos de modelos para as operações sobre a carteira inteira
+        (mesma interface de SqlMetricsStore.iter_blocks). Em memória, um único
+        bloco: o próprio store.
+        """
+        yield self
+
+    def metric_names(self, model_id):
+        """Métricas disponíveis para o modelo"""
+        return list(self._model_metrics.get(int(model_id), []))
+
+    def _empty(self):
+        return self._segments[0].df.iloc[0:0]
+
+    def get_series(self, model_id, metric, start=None, end=None):
+        """
+        Série de uma métrica de um modelo entre start e end (inclusive), ordenada por data.
+        Retorna uma cópia das linhas da série, sem varrer as demais linhas da tabela.
+        """
+        key = (int(model_id), metric)
+        parts = [s.slice(key, start, end) for s in self._segments if key in s.offsets]
+        if not parts:
+            return self._empty()
+        if len(parts) == 1:
+            return parts[0]
+        # Segmentos em ordem de chegada: uma data repetida fica com o lote mais recente
+        return pd.concat(parts).sort_values("date", kind="stable").drop_duplicates("date", keep="last")
+
+    def get_series_many(self, model_ids, metric, start=None, end=None):
+        """
+        Séries de uma métrica de vários modelos, ordenadas por (model_id, date).
+        Os intervalos de cada modelo saem do índice e cada segmento é fatiado uma
+        única vez, com os índices de todas as linhas pedidas.
+        """
+        model_ids = sorted({int(m) for m in model_ids})
+        parts = []
+        for segment in self._segments:
+            ranges = [segment.bounds((model_id, metric), start, end) for model_id in model_ids]
+            ranges = [(i, j) for i, j in ranges if j > i]
+            if ranges:
+                parts.append(segment.df.iloc[np.concatenate([np.arange(i, j) for i, j in ranges])])
+        if not parts:
+            return self._empty()
+        if len(parts) == 1:
+            return parts[0]
+        df = pd.concat(parts).sort_values(["model_id", "date"], kind="stable")
+        return df.drop_duplicates(["model_id", "date"], keep="last")
+
+    def get_metrics(self, model_id, metrics, start=None, end=None):
+        """Concatena as séries de várias métricas de um mesmo modelo"""
+        parts = [self.get_series(model_id, metric, start, end) for metric in metrics]
+        if not parts:
+            return self._empty()
+        return pd.concat(parts)
+
+    def select(self, model_ids=None, metric_names=None, start=None, end=None, columns=None):
+        """
+        Recorte da tabela ordenado por (model_id, metric_name, date), com a mesma
+        interface de SqlMetricsStore.select. Com model_ids, as séries saem do índice;
+        sem, a tabela inteira (frame) é filtrada. Filtros None não restringem.
+        """
+        if model_ids is not None:
+            names = None if metric_names is None else set(metric_names)
+            parts = [
+                self.get_series(model_id, metric, start, end)
+                for model_id in sorted({int(m) for m in model_ids})
+                for metric in sorted(self.metric_names(model_id))
+                if names is None or metric in names
+            ]
+            df = pd.concat(parts, ignore_index=True) if parts else self._empty()
+        else:
+            df = self.frame
+            mask = np.ones(len(df), dtype=bool)
+            if metric_names is not None:
+                mask &= df["metric_name"].isin(metric_names).to_numpy()
+            if start is not None:
+                mask &= df["date"].to_numpy() >= np.datetime64(pd.Timestamp(start))
+            if end is not None:
+                mask &= df["date"].to_numpy() <= np.datetime64(pd.Timestamp(end))
+            df = df[mask]
+        return df[columns] if columns is not None else df
+
+    def subset(self, model_ids):
+        """Novo MetricsStore apenas com as séries completas dos modelos informados"""
+        parts = [
+            self.get_series(model_id, metric)
+            for model_id in sorted(int(m) for m in model_ids)
+            for metric in self.metric_names(model_id)
+        ]
+        if not parts:
+            return MetricsStore(self._empty(), presorted=True)
+        # Cada série já está contígua e em ordem de data: o índice de grupos continua válido
+        return MetricsStore(pd.concat(parts, ignore_index=True), presorted=True)
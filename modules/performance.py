@@ -0,0 +1,178 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from modules.aggregation import add_rows, group_keys, model_blocks, month_dates, split_keys
+from modules.stability import (
+    SCORE_COLUMN, TARGET_COLUMN, bin_codes, bin_spec, file_samples, iter_chunks, merge_histograms,
+    merge_samples, n_bins, score_files,
+)
+
+# -----------------------------
+# Métricas de performance por contrato
+# -----------------------------
+# Lê dos extratos (ver modules.stability) apenas model_id, date, score e target
+COLUMNS = ["model_id", "date", SCORE_COLUMN, TARGET_COLUMN]
+
+# Faixas finas do score para AUC/KS: pares de contratos na mesma faixa contam como
+# empate, então o erro do AUC fica abaixo de ~1/SCORE_BINS
+SCORE_BINS = 1000
+# Score a partir do qual o contrato é classificado como default (Accuracy)
+ACCURACY_THRESHOLD = 0.5
+
+# Momentos acumulados por (modelo, mês) para RMSE/R2
+_N, _SUM_Y, _SUM_Y2, _SSE, _NON_BINARY = range(5)
+
+
+def score_spec(pool, paths, chunksize, threshold=ACCURACY_THRESHOLD, score_bins=SCORE_BINS):
+    """
+    Faixas finas do score por modelo, {model_id: faixas}, a partir de uma amostra
+    uniforme de todas as linhas do modelo em todos os extratos (uma passada de
+    leitura no pool), com o threshold da Accuracy como um dos limites: a Accuracy
+    é exata, só AUC/KS dependem da resolução das faixas.
+    """
+    samples = {}
+    columns = ["model_id", "date", SCORE_COLUMN]
+    futures = [pool.submit(file_samples, path, chunksize, None, columns) for path in paths]
+    for future in as_completed(futures):
+        merge_samples(samples, future.result())
+    specs = {}
+    for model_id, (_, rows) in samples.items():
+        _, bounds = bin_spec(pd.to_numeric(rows[SCORE_COLUMN], errors="coerce"), score_bins)
+        specs[model_id] = ("num", np.union1d(bounds, [threshold]))
+    return specs
+
+
+def accumulate(state, chunk, specs):
+    """
+    Soma um bloco ao estado {"pos"/"neg": {chave: contagens por faixa}, "moments": {chave: momentos}}.
+    pos/neg contam os contratos com target 1/0 em cada faixa de score do modelo
+    (specs: {model_id: faixas}); os momentos (n, Σy, Σy², Σ(score - y)², nº de
+    targets não binários) dão RMSE e R2.
+    """
+    target = pd.to_numeric(chunk[TARGET_COLUMN], errors="coerce").to_numpy(dtype=float)
+    chunk = chunk[~np.isnan(target)]
+    target = target[~np.isnan(target)]
+    if chunk.empty:
+        return state
+
+    keys, group = np.unique(group_keys(chunk), return_inverse=True)
+    for model_id, i, j, rows in model_blocks(keys, group):
+        spec = specs.get(model_id)
+        if spec is None:
+            continue
+        size, block_keys = n_bins(spec), keys[i:j].tolist()
+        flat = (group[rows] - i) * size + bin_codes(chunk[SCORE_COLUMN].iloc[rows], spec)
+        labels = target[rows]
+        for name, label in [("pos", 1), ("neg", 0)]:
+            counts = np.bincount(flat[labels == label], minlength=len(block_keys) * size)
+            add_rows(state.setdefault(name, {}), block_keys, counts.reshape(len(block_keys), size))
+
+    score = pd.to_numeric(chunk[SCORE_COLUMN], errors="coerce").to_numpy(dtype=float)
+    valid = ~np.isnan(score)
+    error = np.where(valid, score - target, 0)
+    weights = [valid, target * valid, target ** 2 * valid, error ** 2, (target != 0) & (target != 1)]
+    moments = np.stack([np.bincount(group, w, minlength=len(keys)) for w in weights], axis=1)
+    add_rows(state.setdefault("moments", {}), keys.tolist(), moments)
+    return state
+
+
+def file_state(path, specs, chunksize):
+    """Contagens e momentos de um extrato, lido em blocos (executado nos processos do pool)"""
+    state = {}
+    for chunk in iter_chunks(path, chunksize, columns=COLUMNS):
+        accumulate(state, chunk, specs)
+    return state
+
+
+def _rank_metrics(pos, neg, spec, threshold):
+    """AUC, KS e Accuracy de cada linha de pos/neg (meses x faixas de score de um modelo)"""
+    # A última faixa (score ausente) fica fora de AUC/KS/Accuracy
+    pos, neg = pos[:, :-1].astype(float), neg[:, :-1].astype(float)
+    n_pos, n_neg = pos.sum(axis=1), neg.sum(axis=1)
+    cutoff = np.searchsorted(spec[1], threshold, side="right")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # AUC: P(score de um default > score de um não default), empates valem 1/2
+        below = np.cumsum(neg, axis=1) - neg
+        auc = (pos * (below + 0.5 * neg)).sum(axis=1) / (n_pos * n_neg)
+        ks = np.abs(np.cumsum(pos, axis=1) / n_pos[:, None] - np.cumsum(neg, axis=1) / n_neg[:, None]).max(axis=1)
+        accuracy = (neg[:, :cutoff].sum(axis=1) + pos[:, cutoff:].sum(axis=1)) / (n_pos + n_neg)
+    return auc, ks, accuracy, (n_pos > 0) & (n_neg > 0)
+
+
+def performance_metrics(state, specs, threshold=ACCURACY_THRESHOLD):
+    """
+    Tabela longa (esquema da tabela de métricas, metric_type="performance") por modelo e mês.
+
+    ROC-AUC, KS e Accuracy saem das contagens por faixa de score, de todos os meses
+    de um modelo de uma vez (specs: faixas por modelo, ver score_spec); só existem
+    para targets binários com as duas classes.
+    RMSE e R2 (1 - SSE/SST; para target binário, o R² de Efron) saem dos momentos.
+    """
+    moments_by_key = state.get("moments", {})
+    keys = np.array(sorted(moments_by_key), dtype=np.int64)
+    columns = ["model_id", "metric_name", "metric_value", "metric_type", "date"]
+    if len(keys) == 0:
+        return pd.DataFrame(columns=columns)
+
+    # Chaves ordenadas: cada modelo ocupa um intervalo contíguo; o número de faixas varia entre modelos
+    model_ids, months = split_keys(keys)
+    auc, ks, accuracy = (np.full(len(keys), np.nan) for _ in range(3))
+    both = np.zeros(len(keys), dtype=bool)
+    bounds = np.flatnonzero(np.diff(model_ids)) + 1
+    for i, j in zip(np.concatenate(([0], bounds)), np.concatenate((bounds, [len(keys)]))):
+        spec = specs.get(int(model_ids[i]))
+        if spec is None:
+            continue
+        block = keys[i:j].tolist()
+        pos = np.stack([state["pos"][k] for k in block])
+        neg = np.stack([state["neg"][k] for k in block])
+        auc[i:j], ks[i:j], accuracy[i:j], both[i:j] = _rank_metrics(pos, neg, spec, threshold)
+
+    moments = np.stack([moments_by_key[k] for k in keys.tolist()])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        n = moments[:, _N]
+        rmse = np.sqrt(moments[:, _SSE] / n)
+        r2 = 1 - moments[:, _SSE] / (moments[:, _SUM_Y2] - moments[:, _SUM_Y] ** 2 / n)
+
+    binary = (moments[:, _NON_BINARY] == 0) & both
+    frames = []
+    for name, values, valid in [
+        ("ROC-AUC", auc, binary), ("KS", ks, binary), ("Accuracy", accuracy, binary),
+        ("RMSE", rmse, n > 0), ("R2", r2, np.isfinite(r2)),
+    ]:
+        frames.append(pd.DataFrame({
+            "model_id": model_ids[valid],
+            "metric_name": name,
+            "metric_value": np.round(values[valid], 4),
+            "metric_type": "performance",
+            "date": month_dates(months[valid]),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def compute_performance(scores_dir, workers=None, chunksize=500_000, threshold=ACCURACY_THRESHOLD,
+                        score_bins=SCORE_BINS, progress=print):
+    """
+    Calcula ROC-AUC, KS, Accuracy, RMSE e R2 a partir dos extratos de score por
+    contrato em scores_dir (colunas model_id, date, score e target).
+
+    As faixas do score são fixadas por modelo (amostra de todos os extratos, uma
+    primeira passada de leitura). Cada extrato é lido em blocos por um processo
+    do pool e devolve apenas as contagens por faixa de score e os momentos de
+    cada (modelo, mês), que são somados e convertidos em métricas no final.
+    """
+    paths = score_files(scores_dir)
+    if not paths:
+        raise FileNotFoundError(f"nenhum extrato de score em {scores_dir}")
+
+    state = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        specs = score_spec(pool, paths, chunksize, threshold, score_bins)
+        progress(f"faixas de score de {len(specs)} modelos fixadas")
+        futures = [pool.submit(file_state, path, specs, chunksize) for path in paths]
+        for done, future in enumerate(as_completed(futures), start=1):
+            merge_histograms(state, future.result())
+            progress(f"[{done}/{len(paths)}] extratos lidos")
+    return performance_metrics(state, specs, threshold)
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+
+from modules.metrics import STATUS_LABELS, classify_thresholds
+
+# Tipos de métrica acompanhados na visão de carteira
+PORTFOLIO_TYPES = ["performance", "stability", "risk"]
+
+
+def _latest_points(store):
+    """Último e penúltimo ponto de cada série de um store em memória"""
+    df = store.frame
+    starts, stops = store.group_bounds()
+    last = stops - 1
+    has_previous = stops - starts > 1
+    previous = np.where(has_previous, stops - 2, last)
+
+    # Apenas as linhas usadas são convertidas para número (risk_level não é numérico)
+    # (valores float32 da tabela compacta seguem em float32 até a classificação)
+    raw = df["metric_value"].to_numpy()
+    value = pd.to_numeric(pd.Series(raw[last]), errors="coerce").to_numpy()
+    prev_value = pd.to_numeric(pd.Series(raw[previous]), errors="coerce").to_numpy()
+    return pd.DataFrame({
+        "model_id": df["model_id"].to_numpy()[last],
+        "metric_name": df["metric_name"].to_numpy()[last],
+        "date": df["date"].to_numpy()[last],
+        "value": value,
+        "previous": np.where(has_previous, prev_value, np.nan),
+    })
+
+
+def portfolio_status(store, metrics_desc, models, types=PORTFOLIO_TYPES):
+    """
+    Último valor, status e tendência de todas as combinações modelo x métrica.
+
+    Usa as fronteiras de grupo do MetricsStore: o último ponto de cada série é a
+    última linha do seu grupo e o anterior é a penúltima, então tudo é resolvido com
+    indexação de arrays, sem laço por modelo. Thresholds e direção vêm de um único
+    merge com metricas_descricao. A tabela é lida bloco a bloco (store.iter_blocks):
+    no backend SQLite, nunca inteira em memória.
+
+    Retorna um DataFrame com model_id, name, metric_name, date, value, previous,
+    delta, status (0 bom, 1 atenção, 2 alerta), status_label e trend
+    (1 melhora, -1 piora, 0 estável/sem direção).
+    """
+    latest = pd.concat([_latest_points(block) for block in store.iter_blocks()], ignore_index=True)
+    value = latest["value"].to_numpy()
+
+    # Métricas categóricas (ex.: risk_level) não têm status numérico
+    latest = latest[~np.isnan(value)]
+
+    desc = metrics_desc[metrics_desc["type"].isin(types)][["metric_name", "attention", "alert", "direction"]]
+    latest = latest.merge(desc, on="metric_name", how="inner")
+    latest = latest.merge(
+        models[["id", "name"]].rename(columns={"id": "model_id"}), on="model_id", how="left"
+    )
+
+    latest["status"] = classify_thresholds(
+        latest["value"].to_numpy(),
+        latest["attention"].to_numpy(dtype=float, na_value=np.nan),
+        latest["alert"].to_numpy(dtype=float, na_value=np.nan),
+        latest["direction"].to_numpy(),
+    )
+    latest["status_label"] = np.asarray(STATUS_LABELS, dtype=object)[latest["status"].to_numpy()]
+
+    # Tendência: sinal da variação, invertido quando menor é melhor
+    latest["delta"] = latest["value"] - latest["previous"]
+    sign = np.select(
+        [latest["direction"] == "higher_better", latest["direction"] == "lower_better"], [1, -1], 0
+    )
+    latest["trend"] = (np.sign(latest["delta"].fillna(0).to_numpy()) * sign).astype(np.int8)
+
+    return latest[[
+        "model_id", "name", "metric_name", "date", "value", "previous", "delta",
+        "status", "status_label", "trend",
+    ]]
+
+
+def update_portfolio_status(status, store, metrics_desc, models, model_ids, types=PORTFOLIO_TYPES):
+    """Recalcula em status apenas as linhas dos modelos informados (após ingestão incremental)"""
+    fresh = portfolio_status(store.subset(model_ids), metrics_desc, models, types)
+    kept = status[~status["model_id"].isin(list(model_ids))]
+    return pd.concat([kept, fresh], ignore_index=True).sort_values("model_id", kind="stable", ignore_index=True)
@@ -0,0 +1,181 @@
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from modules import data_store
+from modules.graficos import plot_metric
+from modules.metrics import DEFAULT_RATE_METRICS, compute_default_rates
+from modules.risk_matrix import RISK_LEVELS, RISK_SCORE, count_risk_matrix
+
+# Tipos de métrica com um gráfico por métrica no pacote
+REPORT_METRIC_TYPES = ["performance", "stability"]
+
+FIGSIZE = (12, 5)
+# Margens fixas das figuras reaproveitadas (espaço à direita para a legenda do plot_metric):
+# evita recalcular tight_layout a cada modelo
+MARGINS = dict(left=0.07, right=0.82, bottom=0.2, top=0.9)
+# Compressão PNG rápida: arquivos ~20% maiores, gravação ~25% mais rápida
+PNG_OPTIONS = {"pil_kwargs": {"compress_level": 1}}
+RISK_COLORS = {1: "#2ecc71", 2: "#f1c40f", 3: "#e67e22", 4: "#e74c3c"}
+
+# Estado de cada processo do pool: dados compartilhados e figuras reaproveitadas
+_worker = {}
+
+
+def _slug(text):
+    """Nome seguro para arquivo/diretório"""
+    return re.sub(r"[^\w.-]+", "_", str(text)).strip("_")
+
+
+# -----------------------------
+# Gráficos estáticos
+# -----------------------------
+def _figure(name):
+    """Figura (com um eixo) reaproveitada pelo processo para todos os modelos"""
+    if name not in _worker["figures"]:
+        import matplotlib.pyplot as plt
+
+        fig, _ = plt.subplots(figsize=FIGSIZE)
+        fig.subplots_adjust(**MARGINS)
+        _worker["figures"][name] = fig
+    return _worker["figures"][name]
+
+
+def draw_default_rates(ax, rates):
+    """Taxas realizada x estimada (%) de um modelo em um eixo existente"""
+    ax.clear()
+    ax.plot(rates["date"], rates["realizada"] * 100, marker="o", color="gray", label="Realizada (%)")
+    ax.plot(rates["date"], rates["estimada"] * 100, marker="o", color="blue", linestyle=":", label="Estimada (%)")
+    ax.set_ylabel("Taxa de Default (%)")
+    ax.set_xlabel("Data")
+    ax.yaxis.grid(True, linestyle="--", alpha=0.7)
+    ax.legend(loc="best")
+    return ax.figure
+
+
+def draw_pd_error(ax, rates):
+    """Erro de PD (estimada - realizada, em p.p.) de um modelo em um eixo existente"""
+    ax.clear()
+    ax.axhline(0, color="gray", linestyle="--")
+    ax.plot(rates["date"], rates["erro_pp"], marker="o", color="blue", label="Erro")
+    ax.set_ylabel("Erro de PD (%)")
+    ax.set_xlabel("Data")
+    ax.set_ylim(-5, 5)
+    ax.yaxis.grid(True, linestyle="--", alpha=0.7)
+    return ax.figure
+
+
+def draw_risk_matrix(ax, models_df):
+    """Matriz de risco (qualitativo x quantitativo) com a contagem de modelos por célula"""
+    from matplotlib.colors import ListedColormap
+
+    ax.clear()
+    counts = count_risk_matrix(models_df)
+    cmap = ListedColormap([RISK_COLORS[k] for k in sorted(RISK_COLORS)])
+    ax.imshow(RISK_SCORE, cmap=cmap, vmin=1, vmax=4, origin="lower")
+    for (i, j), n in np.ndenumerate(counts):
+        if n:
+            ax.text(j, i, str(n), ha="center", va="center", fontsize=14, fontweight="bold")
+    ax.set_xticks(range(len(RISK_LEVELS)), RISK_LEVELS)
+    ax.set_yticks(range(len(RISK_LEVELS)), RISK_LEVELS)
+    ax.set_xlabel("Risco Quantitativo")
+    ax.set_ylabel("Risco Qualitativo")
+    return ax.figure
+
+
+# -----------------------------
+# Processos do pool
+# -----------------------------
+def _init_worker(data_dir, output_dir, fmt, dpi):
+    """Carrega os dados uma vez por processo (ou herda os do pai, com fork)"""
+    import matplotlib
+
+    matplotlib.use("Agg")
+    data_store.DATA_DIR = data_dir
+    metrics_desc = data_store.get_dataset("metricas_info")
+    _worker.update(
+        store=data_store.get_metrics_store(),
+        models=data_store.get_dataset("models").set_index("id"),
+        metrics_desc=metrics_desc[metrics_desc["type"].isin(REPORT_METRIC_TYPES)].set_index("metric_name"),
+        output_dir=output_dir,
+        fmt=fmt,
+        dpi=dpi,
+        figures={},
+    )
+
+
+def _render_model(model_id):
+    """Renderiza os gráficos de um modelo; retorna o número de arquivos gravados"""
+    store, model = _worker["store"], _worker["models"].loc[model_id]
+    charts = []
+
+    metrics_desc = _worker["metrics_desc"]
+    for metric in store.metric_names(model_id):
+        if metric not in metrics_desc.index:
+            continue
+        row = metrics_desc.loc[metric]
+        thresholds = {k: row[k] for k in ["attention", "alert"] if row[k] == row[k]}
+        df = store.get_series(model_id, metric)
+        fig = plot_metric(df, metric, thresholds, direction=row["direction"], ax=_figure("metric").axes[0])
+        charts.append((metric, fig))
+
+    rates = compute_default_rates(store.get_metrics(model_id, DEFAULT_RATE_METRICS), model["vol_carteira"])
+    if len(rates["date"]):
+        charts.append(("taxas_default", draw_default_rates(_figure("default_rates").axes[0], rates)))
+        charts.append(("erro_pd", draw_pd_error(_figure("pd_error").axes[0], rates)))
+
+    name = _slug(model["name"])
+    if _worker["fmt"] == "pdf":
+        from matplotlib.backends.backend_pdf import PdfPages
+
+        with PdfPages(os.path.join(_worker["output_dir"], f"{name}.pdf")) as pdf:
+            for title, fig in charts:
+                fig.suptitle(f"{model['name']} · {title}")
+                pdf.savefig(fig)
+                fig.suptitle("")
+        return 1
+
+    model_dir = os.path.join(_worker["output_dir"], name)
+    os.makedirs(model_dir, exist_ok=True)
+    for title, fig in charts:
+        fig.savefig(os.path.join(model_dir, f"{_slug(title)}.png"), dpi=_worker["dpi"], **PNG_OPTIONS)
+    return len(charts)
+
+
+def _render_batch(model_ids):
+    return len(model_ids), sum(_render_model(model_id) for model_id in model_ids)
+
+
+def export_report(data_dir, output_dir, workers=None, fmt="png", dpi=100, batch_size=20,
+                  model_ids=None, progress=print):
+    """
+    Exporta os gráficos estáticos de todos os modelos (ou de model_ids) para output_dir.
+
+    Por modelo: um gráfico por métrica de performance/estabilidade, taxas de default
+    e erro de PD, em PNG (um diretório por modelo) ou PDF (um arquivo por modelo);
+    mais a matriz de risco da carteira. Os modelos são distribuídos em lotes por um
+    pool de workers processos; cada processo cria suas figuras uma vez e as redesenha
+    para cada modelo. Retorna o número de arquivos gravados.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Carregados antes do pool: com fork, os processos herdam os dados sem reler
+    _init_worker(data_dir, output_dir, fmt, dpi)
+    models = data_store.get_dataset("models")
+    fig = draw_risk_matrix(_figure("risk_matrix").axes[0], models)
+    fig.savefig(os.path.join(output_dir, f"matriz_risco.{fmt}"), dpi=dpi)
+    n_files = 1
+
+    ids = models["id"].tolist() if model_ids is None else list(model_ids)
+    batches = [ids[i:i + batch_size] for i in range(0, len(ids), batch_size)]
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(data_dir, output_dir, fmt, dpi)) as pool:
+        for future in as_completed([pool.submit(_render_batch, batch) for batch in batches]):
+            n_models, files = future.result()
+            done += n_models
+            n_files += files
+            progress(f"[{done}/{len(ids)}] modelos exportados ({n_files} arquivos)")
+    return n_files
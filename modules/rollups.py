@@ -0,0 +1,195 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from modules.metrics_store import SORT_KEYS, MetricsStore
+
+# Granularidades de agregação, da mais fina para a mais grossa
+ROLLUP_FREQS = ["M", "Q", "Y"]
+FREQ_LABELS = {"M": "mês", "Q": "trimestre", "Y": "ano"}
+
+# Taxas de default são agregadas pela média ponderada pelo volume de contratos do mês
+WEIGHTED_METRICS = ["taxa_default_realizada", "taxa_default_estimada"]
+WEIGHT_METRIC = "vol_contratos"
+
+# Máximo de pontos por série enviados a um gráfico
+MAX_POINTS = int(os.environ.get("MONITOR_MAX_POINTS", "120"))
+
+
+# -----------------------------
+# Cálculo dos agregados
+# -----------------------------
+def _period_start(dates, freq):
+    """Início do período (mês, trimestre ou ano) de cada data, em datetime64[ns]"""
+    months = dates.astype("datetime64[M]")
+    if freq == "Q":
+        m = months.astype(np.int64)
+        months = (m - m % 3).astype("datetime64[M]")
+    elif freq == "Y":
+        months = dates.astype("datetime64[Y]").astype("datetime64[M]")
+    return months.astype("datetime64[ns]")
+
+
+def _weights(df, values):
+    """
+    Peso de cada linha: vol_contratos do modelo no mesmo mês para as taxas de default
+    e 1 para as demais métricas. Taxas sem volume correspondente recebem peso 0.
+    """
+    weights = np.ones(len(df))
+    rates = df["metric_name"].isin(WEIGHTED_METRICS).to_numpy()
+    if rates.any():
+        is_vol = (df["metric_name"] == WEIGHT_METRIC).to_numpy()
+        vol = pd.Series(
+            values[is_vol],
+            index=pd.MultiIndex.from_arrays([df["model_id"].to_numpy()[is_vol], df["date"].to_numpy()[is_vol]]),
+        )
+        vol = vol[~vol.index.duplicated(keep="last")]
+        keys = pd.MultiIndex.from_arrays([df["model_id"].to_numpy()[rates], df["date"].to_numpy()[rates]])
+        w = vol.reindex(keys).to_numpy()
+        weights[rates] = np.where(w > 0, w, 0.0)
+    return weights
+
+
+def _numeric_rows(df):
+    """Arrays das linhas numéricas da tabela (risk_level e valores ausentes ficam de fora)"""
+    values = pd.to_numeric(df["metric_value"], errors="coerce").to_numpy(dtype=float)
+    keep = ~np.isnan(values)
+    df, values = df[keep], values[keep]
+    return {
+        "model_id": df["model_id"].to_numpy(),
+        "metric_name": df["metric_name"].to_numpy(),
+        "date": df["date"].to_numpy(),
+        "value": values,
+        "weight": _weights(df, values),
+    }
+
+
+def _reduce(rows, freq):
+    """Estatísticas por bloco contíguo (modelo, métrica, período) com um reduceat por coluna"""
+    model_ids, names, values, weights = rows["model_id"], rows["metric_name"], rows["value"], rows["weight"]
+    periods = _period_start(rows["date"], freq)
+
+    n = len(values)
+    if n == 0:
+        return pd.DataFrame({
+            "model_id": model_ids, "metric_name": names, "date": periods, "metric_value": values,
+            "min": values, "max": values, "last": values, "n_points": np.array([], dtype=int),
+        })
+
+    change = np.flatnonzero(
+        (model_ids[1:] != model_ids[:-1]) | (names[1:] != names[:-1]) | (periods[1:] != periods[:-1])
+    ) + 1
+    starts = np.concatenate(([0], change))
+    stops = np.concatenate((change, [n]))
+    count = stops - starts
+
+    wsum = np.add.reduceat(weights, starts)
+    mean = np.add.reduceat(values, starts) / count
+    wmean = np.add.reduceat(values * weights, starts) / np.where(wsum > 0, wsum, 1.0)
+
+    return pd.DataFrame({
+        "model_id": model_ids[starts],
+        "metric_name": names[starts],
+        "date": periods[starts],
+        "metric_value": np.where(wsum > 0, wmean, mean),
+        "min": np.minimum.reduceat(values, starts),
+        "max": np.maximum.reduceat(values, starts),
+        "last": values[stops - 1],
+        "n_points": count,
+    })
+
+
+def build_rollup(df, freq):
+    """
+    Agrega a tabela de métricas por modelo x métrica x período (freq: "M", "Q" ou "Y").
+
+    A tabela deve estar ordenada por (model_id, metric_name, date): cada período de
+    uma série é então um bloco contíguo de linhas e as estatísticas saem de um
+    único reduceat por coluna. metric_value é a média do período (ponderada por
+    vol_contratos para as taxas de default; média simples se não houver volume);
+    min, max e last acompanham. Valores não numéricos (ex.: risk_level) são ignorados.
+    """
+    return _reduce(_numeric_rows(df), freq)
+
+
+class Rollups:
+    """
+    Séries agregadas por período, uma tabela indexada (MetricsStore) por granularidade.
+    As consultas têm a mesma forma das do MetricsStore, com a granularidade à frente.
+    """
+
+    def __init__(self, frames):
+        self.frames = frames
+        self.stores = {freq: MetricsStore(df, presorted=True) for freq, df in frames.items()}
+
+    @property
+    def freqs(self):
+        """Granularidades disponíveis, da mais fina para a mais grossa"""
+        return [freq for freq in ROLLUP_FREQS if freq in self.stores]
+
+    def get_metrics(self, freq, model_id, metrics, start=None, end=None):
+        """Séries agregadas de várias métricas de um modelo; start é levado ao início do seu período"""
+        if start is not None:
+            start = _period_start(np.array([pd.Timestamp(start).to_datetime64()]), freq)[0]
+        return self.stores[freq].get_metrics(model_id, metrics, start, end)
+
+    def update(self, store, model_ids):
+        """Novos Rollups com as séries dos modelos informados recalculadas a partir de store"""
+        fresh = build_rollups(store.subset(model_ids), self.freqs, skip_unreduced=False)
+        model_ids = list(model_ids)
+        frames = {}
+        for freq, df in self.frames.items():
+            kept = df[~df["model_id"].isin(model_ids)]
+            frames[freq] = pd.concat([kept, fresh.frames[freq]], ignore_index=True).sort_values(
+                SORT_KEYS, kind="stable", ignore_index=True
+            )
+        return Rollups(frames)
+
+
+def build_rollups(store, freqs=ROLLUP_FREQS, skip_unreduced=True):
+    """
+    Calcula os agregados de todas as séries do store nas granularidades freqs.
+    Com skip_unreduced, uma granularidade que não reduz nenhuma série (ex.: mensal
+    sobre dados já mensais) não é guardada: os dados brutos a substituem.
+    A tabela é lida por blocos de modelos (store.iter_blocks); cada bloco contém
+    séries inteiras, então os agregados dos blocos só são concatenados.
+    """
+    parts = {freq: [] for freq in freqs}
+    for block in store.iter_blocks():
+        rows = _numeric_rows(block.frame)
+        for freq in freqs:
+            parts[freq].append(_reduce(rows, freq))
+    frames = {}
+    for freq in freqs:
+        rollup = pd.concat(parts[freq], ignore_index=True) if len(parts[freq]) > 1 else parts[freq][0]
+        if skip_unreduced and len(rollup) and rollup["n_points"].max() <= 1:
+            continue
+        frames[freq] = rollup
+    return Rollups(frames)
+
+
+# -----------------------------
+# Seleção da granularidade dos gráficos
+# -----------------------------
+def _points_per_series(df, metrics):
+    return len(df) / max(len(metrics), 1)
+
+
+def chart_series(store, rollups, model_id, metrics, start=None, end=None, max_points=MAX_POINTS):
+    """
+    Séries de um modelo para um gráfico, com no máximo max_points pontos por métrica.
+    Usa os pontos brutos quando cabem; senão, a granularidade menos agregada que
+    caiba (ou a mais grossa disponível). Retorna (DataFrame, freq), com freq None
+    para os dados brutos.
+    """
+    raw = store.get_metrics(model_id, metrics, start, end)
+    if rollups is None or _points_per_series(raw, metrics) <= max_points:
+        return raw, None
+
+    df, chosen = raw, None
+    for freq in rollups.freqs:
+        df, chosen = rollups.get_metrics(freq, model_id, metrics, start, end), freq
+        if _points_per_series(df, metrics) <= max_points:
+            break
+    return df, chosen
@@ -0,0 +1,256 @@
+import queue
+import sqlite3
+from contextlib import contextmanager
+
+import pandas as pd
+
+from modules.metrics_store import MetricsStore
+from modules.storage import compact_metrics, normalize_metrics
+
+# -----------------------------
+# Esquema do banco embarcado (SQLite)
+# -----------------------------
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metrics (
+    model_id     INTEGER NOT NULL,
+    metric_name  TEXT    NOT NULL,
+    metric_value REAL,
+    metric_level TEXT,
+    metric_type  TEXT,
+    date         TEXT    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_metrics_key ON metrics (model_id, metric_name, date);
+CREATE TABLE IF NOT EXISTS ingested_partitions (source TEXT PRIMARY KEY);
+"""
+
+METRICS_SELECT = "SELECT model_id, metric_name, metric_value, metric_level, metric_type, date FROM metrics"
+
+# Máximo de model_id por query (o SQLite limita os parâmetros por comando: 999
+# em versões antigas); listas maiores viram várias queries
+MAX_PARAMS = 900
+# Modelos por bloco nas operações sobre a carteira inteira (ver iter_blocks)
+MODELS_PER_BLOCK = 500
+
+# Tabelas do app -> tabela no banco
+TABLES = {
+    "models": "models",
+    "metricas_info": "metricas_descricao",
+}
+
+
+def _date(value):
+    """Datas são gravadas como texto ISO (YYYY-MM-DD), comparável como string"""
+    return pd.Timestamp(value).strftime("%Y-%m-%d")
+
+
+def _to_rows(df):
+    """Tabela de métricas normalizada -> DataFrame no formato das colunas do banco"""
+    df = normalize_metrics(df)
+    return pd.DataFrame({
+        "model_id": df["model_id"],
+        "metric_name": df["metric_name"].astype(str),
+        "metric_value": df["metric_value"],
+        "metric_level": df["metric_level"].astype(object),
+        "metric_type": df["metric_type"].astype(str),
+        "date": df["date"].dt.strftime("%Y-%m-%d"),
+    })
+
+
+def build_database(db_path, models, metrics_chunks, metrics_desc):
+    """
+    Cria o banco com as três tabelas do app e o índice (model_id, metric_name, date).
+    db_path deve ser um arquivo novo (o convert_data.py grava em um temporário e renomeia).
+    metrics_chunks é um iterável de blocos da tabela longa de métricas.
+    Retorna o número de linhas de métricas gravadas.
+    """
+    n_rows = 0
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.executescript(SCHEMA)
+        models.to_sql(TABLES["models"], conn, if_exists="replace", index=False)
+        metrics_desc.to_sql(TABLES["metricas_info"], conn, if_exists="replace", index=False)
+        for chunk in metrics_chunks:
+            rows = _to_rows(chunk)
+            rows.to_sql("metrics", conn, if_exists="append", index=False, chunksize=100_000)
+            n_rows += len(rows)
+        # Uma linha por chave, como no MetricsStore: fica a última gravada
+        n_rows -= conn.execute(
+            "DELETE FROM metrics WHERE rowid NOT IN "
+            "(SELECT MAX(rowid) FROM metrics GROUP BY model_id, metric_name, date)"
+        ).rowcount
+        conn.execute("ANALYZE")
+        conn.commit()
+    finally:
+        conn.close()
+    return n_rows
+
+
+class _ConnectionPool:
+    """Pool fixo de conexões SQLite compartilhado entre as threads das sessões"""
+
+    def __init__(self, db_path, size):
+        self._queue = queue.LifoQueue()
+        for _ in range(size):
+            self._queue.put(sqlite3.connect(db_path, check_same_thread=False))
+
+    @contextmanager
+    def connection(self):
+        conn = self._queue.get()
+        try:
+            yield conn
+        finally:
+            self._queue.put(conn)
+
+
+class SqlMetricsStore:
+    """
+    Backend SQL com a mesma interface do MetricsStore.
+
+    Cada consulta das páginas vira uma query parametrizada que usa o índice
+    (model_id, metric_name, date), então apenas as linhas desenhadas saem do banco.
+    As operações sobre a carteira inteira leem o banco em blocos de modelos
+    (iter_blocks); não há cópia da tabela inteira em memória (frame).
+    As requisições das páginas só leem: o banco é gravado pelo convert_data.py e
+    pela ingestão de partições em segundo plano (data_store._refresh_partitions).
+    """
+
+    def __init__(self, db_path, pool_size=4):
+        self.db_path = db_path
+        self._pool = _ConnectionPool(db_path, pool_size)
+        self._tables = {}
+
+        date_min, date_max = self._fetchone("SELECT MIN(date), MAX(date) FROM metrics")
+        self.date_min = pd.Timestamp(date_min) if date_min else pd.NaT
+        self.date_max = pd.Timestamp(date_max) if date_max else pd.NaT
+
+    def _fetchone(self, sql, params=()):
+        with self._pool.connection() as conn:
+            return conn.execute(sql, params).fetchone()
+
+    def _query(self, sql, params=()):
+        with self._pool.connection() as conn:
+            df = pd.read_sql_query(sql, conn, params=params)
+        df["date"] = pd.to_datetime(df["date"])
+        return df
+
+    def read_table(self, name):
+        """Lê (uma vez) uma das tabelas pequenas: models ou metricas_info"""
+        if name not in self._tables:
+            with self._pool.connection() as conn:
+                self._tables[name] = pd.read_sql_query(f"SELECT * FROM {TABLES[name]}", conn)
+        return self._tables[name]
+
+    def ingested_sources(self):
+        """Partições já inseridas no banco (persistem entre reinícios do app)"""
+        with self._pool.connection() as conn:
+            return {row[0] for row in conn.execute("SELECT source FROM ingested_partitions")}
+
+    def _where_period(self, start, end):
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("date >= ?")
+            params.append(_date(start))
+        if end is not None:
+            clauses.append("date <= ?")
+            params.append(_date(end))
+        return clauses, params
+
+    def metric_names(self, model_id):
+        """Métricas disponíveis para o modelo"""
+        with self._pool.connection() as conn:
+            rows = conn.execute(
+                "SELECT DISTINCT metric_name FROM metrics WHERE model_id = ?", (int(model_id),)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def get_series(self, model_id, metric, start=None, end=None):
+        """Série de uma métrica de um modelo entre start e end (inclusive), ordenada por data"""
+        return self.get_metrics(model_id, [metric], start, end)
+
+    def get_metrics(self, model_id, metrics, start=None, end=None):
+        """Séries de várias métricas de um mesmo modelo, em uma única query"""
+        return self.select([model_id], list(metrics), start, end)
+
+    def get_series_many(self, model_ids, metric, start=None, end=None):
+        """Séries de uma métrica de vários modelos, em uma única query (índice por modelo e métrica)"""
+        return self.select(model_ids, [metric], start, end)
+
+    def select(self, model_ids=None, metric_names=None, start=None, end=None, columns=None):
+        """
+        Query parametrizada sobre a tabela de métricas, ordenada por (model_id, metric_name, date).
+        Filtros None não restringem; listas vazias não retornam linhas. Mais de
+        MAX_PARAMS modelos são consultados em lotes, concatenados em ordem.
+        """
+        if model_ids is not None:
+            model_ids = sorted({int(m) for m in model_ids})
+            if len(model_ids) > MAX_PARAMS:
+                return pd.concat([
+                    self.select(model_ids[i:i + MAX_PARAMS], metric_names, start, end, columns)
+                    for i in range(0, len(model_ids), MAX_PARAMS)
+                ], ignore_index=True)
+
+        clauses, params = [], []
+        for column, values in [("model_id", model_ids), ("metric_name", metric_names)]:
+            if values is not None:
+                values = [int(v) for v in values] if column == "model_id" else list(values)
+                clauses.append(f"{column} IN ({', '.join('?' * len(values))})" if values else "0")
+                params.extend(values)
+        period, period_params = self._where_period(start, end)
+        clauses += period
+        params += period_params
+
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        df = self._query(f"{METRICS_SELECT}{where} ORDER BY model_id, metric_name, date", params)
+        return df[columns] if columns is not None else df
+
+    def extend(self, df, source=None):
+        """
+        Grava um lote de linhas no banco, substituindo as chaves (model_id,
+        metric_name, date) que já existiam; retorna o conjunto de model_id afetados.
+        source (ex.: caminho da partição) é registrado na mesma transação para que
+        o lote não seja inserido de novo após um reinício.
+        """
+        if df.empty:
+            return set()
+        rows = _to_rows(df).drop_duplicates(["model_id", "metric_name", "date"], keep="last")
+        keys = rows[["model_id", "metric_name", "date"]].to_numpy().tolist()
+        with self._pool.connection() as conn:
+            with conn:
+                conn.executemany("DELETE FROM metrics WHERE model_id = ? AND metric_name = ? AND date = ?", keys)
+                rows.to_sql("metrics", conn, if_exists="append", index=False)
+                if source is not None:
+                    conn.execute("INSERT OR IGNORE INTO ingested_partitions (source) VALUES (?)", (source,))
+        dates = pd.to_datetime(rows["date"])
+        self.date_min = dates.min() if pd.isna(self.date_min) else min(self.date_min, dates.min())
+        self.date_max = dates.max() if pd.isna(self.date_max) else max(self.date_max, dates.max())
+        return set(rows["model_id"].astype(int).unique().tolist())
+
+    def extended(self, batches):
+        """
+        Grava os lotes [(source, df)] no banco (mesma interface de MetricsStore.extended).
+        O banco é persistente: o store retornado é este mesmo, já com os lotes.
+        Retorna (store, model_id afetados).
+        """
+        affected = set()
+        for source, df in batches:
+            affected |= self.extend(df, source=source)
+        return self, affected
+
+    def subset(self, model_ids):
+        """MetricsStore em memória (esquema compacto) apenas com as séries dos modelos informados"""
+        return MetricsStore(compact_metrics(self.select(model_ids=model_ids)), presorted=True)
+
+    def model_ids(self):
+        """model_id presentes na tabela, em ordem (lidos do índice)"""
+        with self._pool.connection() as conn:
+            return [row[0] for row in conn.execute("SELECT DISTINCT model_id FROM metrics ORDER BY model_id")]
+
+    def iter_blocks(self, models_per_block=MODELS_PER_BLOCK):
+        """
+        A tabela em blocos de models_per_block modelos, cada um um MetricsStore em
+        memória: as operações sobre a carteira inteira (status, agregados, alertas)
+        percorrem o banco sem carregá-lo todo. Não há frame da tabela inteira.
+        """
+        ids = self.model_ids()
+        for i in range(0, len(ids), models_per_block):
+            yield self.subset(ids[i:i + models_per_block])
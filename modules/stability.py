@@ -0,0 +1,335 @@
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from modules.aggregation import add_rows, group_keys, model_blocks, month_dates, split_keys
+
+# -----------------------------
+# Extratos de score por contrato
+# -----------------------------
+# Cada linha é um contrato em um mês: model_id, date, score, a variável resposta
+# (target, opcional) e as variáveis do modelo (features). As colunas além de
+# KEY_COLUMNS e TARGET_COLUMN entram no cálculo: score gera o PSI e cada feature
+# gera um CSI_<feature>.
+KEY_COLUMNS = ["model_id", "date"]
+SCORE_COLUMN = "score"
+TARGET_COLUMN = "target"
+PSI_METRIC = "PSI"
+CSI_PREFIX = "CSI_"
+
+# Histograma fino acumulado na leitura; o PSI usa PSI_BINS faixas de massa igual
+# na referência, obtidas juntando faixas finas vizinhas
+FINE_BINS = 100
+PSI_BINS = 10
+# Proporção mínima de uma faixa (evita log(0) em faixas vazias)
+EPSILON = 1e-4
+# Linhas por modelo (amostra uniforme da referência) usadas para fixar as faixas finas
+SAMPLE_ROWS = 50_000
+
+
+def score_files(scores_dir):
+    """Extratos (CSV ou Parquet) do diretório, em ordem de nome; nomes iniciados por "." ou "_" são ignorados"""
+    try:
+        entries = list(os.scandir(scores_dir))
+    except OSError:
+        return []
+    return sorted(
+        e.path for e in entries
+        if e.is_file() and not e.name.startswith((".", "_")) and e.name.endswith((".csv", ".parquet"))
+    )
+
+
+def iter_chunks(path, chunksize, columns=None):
+    """Lê um extrato em blocos de até chunksize linhas (apenas columns, se informado)"""
+    if path.endswith(".parquet"):
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize, usecols=columns)
+
+
+# -----------------------------
+# Faixas e histogramas
+# -----------------------------
+def bin_spec(values, fine_bins=FINE_BINS):
+    """
+    Faixas finas de uma coluna, fixadas a partir de uma amostra:
+    ("num", limites internos por quantis; as faixas das pontas são abertas) ou
+    ("cat", categorias vistas na amostra; as demais caem em "outras").
+    Valores ausentes ficam sempre em uma faixa própria, a última.
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        values = values.to_numpy(dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return ("num", np.array([]))
+        return ("num", np.unique(np.quantile(values, np.linspace(0, 1, fine_bins + 1)[1:-1])))
+    return ("cat", np.sort(values.dropna().astype(str).unique()))
+
+
+def n_bins(spec):
+    kind, bounds = spec
+    # num: faixas entre os limites + ausentes; cat: categorias + outras/ausentes
+    return len(bounds) + 2 if kind == "num" else len(bounds) + 1
+
+
+def bin_codes(values, spec):
+    """Faixa de cada valor (0..n_bins(spec) - 1)"""
+    kind, bounds = spec
+    if kind == "num":
+        values = pd.to_numeric(values, errors="coerce").to_numpy(dtype=float)
+        codes = np.searchsorted(bounds, values, side="right")
+        codes[np.isnan(values)] = len(bounds) + 1
+        return codes
+    codes = pd.Categorical(values.astype(str).where(values.notna()), categories=bounds).codes.astype(np.int64)
+    codes[codes < 0] = len(bounds)
+    return codes
+
+
+# -----------------------------
+# Amostras da referência
+# -----------------------------
+# Coluna auxiliar com a chave aleatória de cada linha: ficar com as SAMPLE_ROWS
+# menores chaves de um modelo é uma amostra uniforme das suas linhas, e amostras
+# de blocos e extratos diferentes se combinam com a mesma regra
+_SAMPLE_KEY = "_sample_key"
+
+
+def _smallest(rows, sample_rows):
+    if len(rows) <= sample_rows:
+        return rows
+    return rows.iloc[np.argpartition(rows[_SAMPLE_KEY].to_numpy(), sample_rows)[:sample_rows]]
+
+
+def merge_samples(total, partial, sample_rows=SAMPLE_ROWS):
+    """
+    Junta amostras {model_id: (mês, linhas)}: fica o mês mais antigo de cada
+    modelo (mês None: sem restrição de mês) e, no mesmo mês, a união das linhas,
+    reduzida de novo a sample_rows.
+    """
+    for model_id, (month, rows) in partial.items():
+        current = total.get(model_id)
+        if current is None or (month is not None and month < current[0]):
+            total[model_id] = (month, rows)
+        elif month == current[0]:
+            total[model_id] = (month, _smallest(pd.concat([current[1], rows], ignore_index=True), sample_rows))
+    return total
+
+
+def file_samples(path, chunksize, reference="first", columns=None, sample_rows=SAMPLE_ROWS):
+    """
+    Amostra uniforme (até sample_rows linhas por modelo) das linhas de referência
+    de um extrato, lido em blocos (executado nos processos do pool).
+    reference: "first" (primeiro mês de cada modelo no extrato), (início, fim)
+        em meses desde 1970 (None: aberto) ou None (todas as linhas).
+    Retorna {model_id: (mês, linhas)}, a combinar com merge_samples.
+    """
+    rng = np.random.default_rng(zlib.crc32(os.path.basename(path).encode()))
+    samples = {}
+    for chunk in iter_chunks(path, chunksize, columns):
+        months = pd.to_datetime(chunk["date"]).to_numpy().astype("datetime64[M]").astype(np.int64)
+        if isinstance(reference, tuple):
+            start, end = reference
+            in_ref = np.ones(len(chunk), dtype=bool)
+            if start is not None:
+                in_ref &= months >= start
+            if end is not None:
+                in_ref &= months <= end
+            chunk, months = chunk[in_ref], months[in_ref]
+        chunk = chunk.assign(**{_SAMPLE_KEY: rng.random(len(chunk))})
+        model_ids = chunk["model_id"].to_numpy()
+        partial = {}
+        for model_id in np.unique(model_ids).tolist():
+            rows = model_ids == model_id
+            if reference == "first":
+                month = int(months[rows].min())
+                rows &= months == month
+            else:
+                month = None
+            partial[model_id] = (month, _smallest(chunk[rows], sample_rows))
+        merge_samples(samples, partial, sample_rows)
+    return samples
+
+
+def reference_months(reference_start=None, reference_end=None):
+    """Referência para file_samples: a janela informada, ou o primeiro mês de cada modelo"""
+    if reference_start is None and reference_end is None:
+        return "first"
+    return (_month_index(reference_start), _month_index(reference_end))
+
+
+def sample_specs(pool, paths, chunksize, reference="first", fine_bins=FINE_BINS):
+    """
+    Faixas de cada coluna por modelo, {model_id: {coluna: faixas}}, fixadas a partir
+    de uma amostra das linhas de referência do modelo em todos os extratos (uma
+    passada de leitura no pool). Cada modelo tem as próprias faixas: os quantis de
+    um modelo não dependem do extrato lido primeiro nem da escala dos demais.
+    """
+    samples = {}
+    futures = [pool.submit(file_samples, path, chunksize, reference) for path in paths]
+    for future in as_completed(futures):
+        merge_samples(samples, future.result())
+    return {
+        model_id: {
+            column: bin_spec(rows[column], fine_bins)
+            for column in rows.columns if column not in KEY_COLUMNS and column not in (TARGET_COLUMN, _SAMPLE_KEY)
+        }
+        for model_id, (_, rows) in samples.items()
+    }
+
+
+def accumulate(hists, chunk, specs):
+    """
+    Soma as contagens de um bloco aos histogramas {coluna: {chave (modelo, mês): contagens}},
+    com as faixas do modelo de cada linha (specs: {model_id: {coluna: faixas}}).
+    Modelos sem faixas (sem linhas na referência) não têm PSI/CSI e são ignorados.
+    A memória depende do número de faixas e de pares (modelo, mês), não de contratos.
+    """
+    keys, group = np.unique(group_keys(chunk), return_inverse=True)
+    for model_id, i, j, rows in model_blocks(keys, group):
+        model_specs = specs.get(model_id)
+        if model_specs is None:
+            continue
+        part, local, block_keys = chunk.iloc[rows], group[rows] - i, keys[i:j].tolist()
+        for column, spec in model_specs.items():
+            if column not in part:
+                continue
+            size = n_bins(spec)
+            flat = local * size + bin_codes(part[column], spec)
+            counts = np.bincount(flat, minlength=len(block_keys) * size).reshape(len(block_keys), size)
+            add_rows(hists.setdefault(column, {}), block_keys, counts)
+    return hists
+
+
+def merge_histograms(total, partial):
+    """Histogramas são aditivos: soma os de um extrato aos acumulados"""
+    for column, by_key in partial.items():
+        add_rows(total.setdefault(column, {}), by_key.keys(), by_key.values())
+    return total
+
+
+def file_histograms(path, specs, chunksize):
+    """Histogramas de um extrato, lido em blocos (executado nos processos do pool)"""
+    hists = {}
+    for chunk in iter_chunks(path, chunksize):
+        accumulate(hists, chunk, specs)
+    return hists
+
+
+# -----------------------------
+# PSI / CSI
+# -----------------------------
+def _coarse_groups(expected, spec, psi_bins):
+    """
+    Junta as faixas finas em até psi_bins faixas de massa ~igual na referência
+    (faixas por quantis da referência). Categorias e ausentes não são agrupados.
+    """
+    kind, _ = spec
+    if kind == "cat":
+        return np.arange(len(expected))
+    values = expected[:-1]
+    total = values.sum()
+    if total == 0:
+        groups = np.arange(len(values)) * psi_bins // max(len(values), 1)
+    else:
+        before = np.cumsum(values) - values
+        groups = np.minimum(before * psi_bins // total, psi_bins - 1)
+    return np.append(groups, psi_bins)
+
+
+def psi(actual, expected, spec, psi_bins=PSI_BINS):
+    """
+    PSI de cada linha de actual (meses x faixas finas) contra a distribuição de
+    referência expected: soma de (a - e) * ln(a / e) sobre as faixas de quantis da referência.
+    """
+    groups = _coarse_groups(expected, spec, psi_bins)
+    starts = np.flatnonzero(np.diff(groups, prepend=-1))
+    a = np.add.reduceat(actual, starts, axis=1).astype(float)
+    e = np.add.reduceat(expected, starts).astype(float)
+    a = np.maximum(a / np.maximum(a.sum(axis=1, keepdims=True), 1), EPSILON)
+    e = np.maximum(e / max(e.sum(), 1), EPSILON)
+    return ((a - e) * np.log(a / e)).sum(axis=1)
+
+
+def _month_index(value):
+    return np.datetime64(pd.Timestamp(value), "M").astype(np.int64) if value is not None else None
+
+
+def stability_metrics(hists, specs, reference_start=None, reference_end=None, psi_bins=PSI_BINS):
+    """
+    Tabela longa (esquema da tabela de métricas, metric_type="stability") com o PSI
+    do score e o CSI de cada feature por modelo e mês.
+
+    A referência de cada modelo são os meses em [reference_start, reference_end];
+    sem janela informada, é o primeiro mês do modelo. Modelos sem meses na janela
+    ficam de fora. specs: faixas por modelo (ver sample_specs).
+    """
+    ref_start, ref_end = _month_index(reference_start), _month_index(reference_end)
+    explicit = ref_start is not None or ref_end is not None
+    frames = []
+    for column, by_key in hists.items():
+        keys = np.array(sorted(by_key), dtype=np.int64)
+        if len(keys) == 0:
+            continue
+        model_ids, months = split_keys(keys)
+        name = PSI_METRIC if column == SCORE_COLUMN else f"{CSI_PREFIX}{column}"
+
+        # Chaves ordenadas: cada modelo ocupa um intervalo contíguo, em ordem de mês
+        bounds = np.flatnonzero(np.diff(model_ids)) + 1
+        values = np.full(len(keys), np.nan)
+        for i, j in zip(np.concatenate(([0], bounds)), np.concatenate((bounds, [len(keys)]))):
+            if explicit:
+                in_ref = np.ones(j - i, dtype=bool)
+                if ref_start is not None:
+                    in_ref &= months[i:j] >= ref_start
+                if ref_end is not None:
+                    in_ref &= months[i:j] <= ref_end
+            else:
+                in_ref = months[i:j] == months[i]
+            if in_ref.any():
+                # Faixas próprias de cada modelo: o número de faixas varia entre modelos
+                counts = np.stack([by_key[k] for k in keys[i:j].tolist()])
+                spec = specs[int(model_ids[i])][column]
+                values[i:j] = psi(counts, counts[in_ref].sum(axis=0), spec, psi_bins)
+
+        valid = ~np.isnan(values)
+        frames.append(pd.DataFrame({
+            "model_id": model_ids[valid],
+            "metric_name": name,
+            "metric_value": np.round(values[valid], 4),
+            "metric_type": "stability",
+            "date": month_dates(months[valid]),
+        }))
+    if not frames:
+        return pd.DataFrame(columns=["model_id", "metric_name", "metric_value", "metric_type", "date"])
+    return pd.concat(frames, ignore_index=True)
+
+
+def compute_stability(scores_dir, workers=None, chunksize=500_000, reference_start=None,
+                      reference_end=None, fine_bins=FINE_BINS, psi_bins=PSI_BINS, progress=print):
+    """
+    Calcula PSI/CSI a partir dos extratos de score por contrato em scores_dir.
+
+    As faixas finas de cada coluna são fixadas uma vez por modelo (amostra da
+    referência do modelo em todos os extratos, uma primeira passada de leitura)
+    para que os histogramas de todos os extratos sejam somáveis. Cada extrato é
+    lido em blocos por um processo do pool (um extrato por modelo = modelos em
+    paralelo) e devolve só os histogramas por (modelo, mês).
+    """
+    paths = score_files(scores_dir)
+    if not paths:
+        raise FileNotFoundError(f"nenhum extrato de score em {scores_dir}")
+
+    hists = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        specs = sample_specs(pool, paths, chunksize, reference_months(reference_start, reference_end), fine_bins)
+        progress(f"faixas de {len(specs)} modelos fixadas")
+        futures = [pool.submit(file_histograms, path, specs, chunksize) for path in paths]
+        for done, future in enumerate(as_completed(futures), start=1):
+            merge_histograms(hists, future.result())
+            progress(f"[{done}/{len(paths)}] extratos lidos")
+    return stability_metrics(hists, specs, reference_start, reference_end, psi_bins)
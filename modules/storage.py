@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# -----------------------------
+# Esquema colunar da tabela de métricas
+# -----------------------------
+# metric_value guarda apenas valores numéricos; valores categóricos
+# (ex.: risk_level = "low"/"medium"/"high") ficam em metric_level.
+_DICT = pa.dictionary(pa.int32(), pa.string())
+
+METRICS_SCHEMA = pa.schema([
+    ("model_id", pa.int64()),
+    ("metric_name", _DICT),
+    ("metric_value", pa.float64()),
+    ("metric_level", _DICT),
+    ("metric_type", _DICT),
+    ("date", pa.timestamp("ns")),
+])
+
+METRICS_COLUMNS = METRICS_SCHEMA.names
+
+
+def normalize_metrics(df):
+    """
+    Converte a tabela longa de métricas (como escrita pelo main.py) para o esquema tipado:
+    valores numéricos em metric_value, valores categóricos em metric_level,
+    nomes/tipos como categóricos e datas como datetime64.
+    """
+    if "metric_level" in df:
+        # Tabela já separada em valor numérico e nível categórico
+        values = pd.to_numeric(df["metric_value"], errors="coerce")
+        levels = df["metric_level"]
+    else:
+        raw = df["metric_value"]
+        values = pd.to_numeric(raw, errors="coerce")
+        levels = raw.where(values.isna() & raw.notna())
+
+    return pd.DataFrame({
+        "model_id": df["model_id"].astype("int64"),
+        "metric_name": df["metric_name"].astype("category"),
+        "metric_value": values.astype("float64"),
+        "metric_level": levels.astype("category"),
+        "metric_type": df["metric_type"].astype("category"),
+        "date": pd.to_datetime(df["date"]),
+    })
+
+
+def _id_dtype(ids):
+    """Menor inteiro (int16 ou int32) que comporta os ids"""
+    if len(ids) == 0 or (ids.min() >= np.iinfo(np.int16).min and ids.max() <= np.iinfo(np.int16).max):
+        return np.int16
+    return np.int32
+
+
+def compact_metrics(df):
+    """
+    Esquema compacto da tabela de métricas em memória (aplicado na carga):
+    categóricos para nomes, tipos e níveis, model_id em int16/int32, valores
+    numéricos em float32 e datas em datetime64. A ordem das linhas é mantida.
+    """
+    df = normalize_metrics(df)
+    ids = df["model_id"].to_numpy()
+    return df.assign(
+        model_id=ids.astype(_id_dtype(ids)),
+        metric_value=df["metric_value"].astype(np.float32),
+    )
+
+
+def memory_usage_mb(df):
+    """Memória ocupada por coluna (MB), incluindo os objetos Python das colunas de texto"""
+    return df.memory_usage(deep=True, index=False) / 1024**2
+
+
+def _to_arrow(df):
+    """DataFrame normalizado -> pyarrow.Table no esquema METRICS_SCHEMA"""
+    table = pa.Table.from_pandas(df[METRICS_COLUMNS], preserve_index=False)
+    return table.cast(METRICS_SCHEMA)
+
+
+def write_metrics_parquet(df, path, row_group_size=1_000_000):
+    """
+    Grava a tabela de métricas em Parquet, ordenada por (model_id, metric_name, date)
+    para que as estatísticas dos row groups permitam filtrar por modelo e data.
+    """
+    df = normalize_metrics(df).sort_values(["model_id", "metric_name", "date"], kind="stable")
+    pq.write_table(_to_arrow(df), path, row_group_size=row_group_size)
+
+
+def write_metrics_chunks(chunks, path, row_group_size=1_000_000):
+    """
+    Grava uma sequência de blocos da tabela de métricas em um único arquivo Parquet,
+    sem manter todos os blocos em memória. Cada bloco é normalizado e ordenado
+    internamente. Retorna o número de linhas gravadas.
+    """
+    n_rows = 0
+    with pq.ParquetWriter(path, METRICS_SCHEMA) as writer:
+        for chunk in chunks:
+            chunk = normalize_metrics(chunk).sort_values(["model_id", "metric_name", "date"], kind="stable")
+            writer.write_table(_to_arrow(chunk), row_group_size=row_group_size)
+            n_rows += len(chunk)
+    return n_rows
+
+
+def convert_metrics_csv(csv_path, parquet_path, chunksize=2_000_000, row_group_size=1_000_000):
+    """
+    Converte o CSV de métricas para Parquet em blocos, sem carregar o arquivo inteiro.
+    Cada bloco é ordenado internamente; como o main.py escreve os dados agrupados
+    por modelo, os row groups continuam seletivos para filtros por model_id.
+    Retorna o número de linhas convertidas.
+    """
+    chunks = pd.read_csv(csv_path, chunksize=chunksize)
+    return write_metrics_chunks(chunks, parquet_path, row_group_size=row_group_size)
@@ -0,0 +1,194 @@
+import numpy as np
+import pandas as pd
+
+# -----------------------------
+# Catálogo de métricas simuladas
+# -----------------------------
+METRICS_PERF = ["Accuracy", "ROC-AUC", "KS", "RMSE", "R2"]
+METRICS_PERF_HIGH = ["Accuracy", "ROC-AUC", "R2"]  # sorteadas em [0.70, 0.95]; as demais em [0.20, 0.40]
+METRICS_STAB = ["PSI"]
+METRICS_DEFAULT = ["taxa_default_realizada", "taxa_default_estimada", "vol_contratos"]
+METRICS_RISK = ["risk_score", "risk_level"]
+
+# Ordem das métricas dentro de cada (modelo, mês) na tabela longa
+METRIC_NAMES = METRICS_PERF + METRICS_STAB + METRICS_DEFAULT + METRICS_RISK
+METRIC_TYPES = (
+    ["performance"] * len(METRICS_PERF) + ["stability"] * len(METRICS_STAB)
+    + ["default"] * len(METRICS_DEFAULT) + ["risk"] * len(METRICS_RISK)
+)
+
+METRIC_TYPE_NAMES = ["performance", "stability", "default", "risk"]
+METRIC_TYPE_CODES = np.array([METRIC_TYPE_NAMES.index(t) for t in METRIC_TYPES])
+
+RISK_LEVELS = ["low", "medium", "high"]
+MODEL_RISK_LEVELS = ["Baixo", "Médio", "Alto"]
+
+METRICS_DESCRIPTION = [
+    # Performance
+    ["ROC-AUC", "Área sob a curva ROC", 0.75, 0.70, "performance", "higher_better"],
+    ["KS", "Kolmogorov-Smirnov", 0.25, 0.20, "performance", "higher_better"],
+    ["Accuracy", "Acurácia do modelo", 0.80, 0.75, "performance", "higher_better"],
+    ["RMSE", "Erro quadrático médio", 0.35, 0.40, "performance", "lower_better"],
+    ["R2", "Coeficiente de determinação", 0.60, 0.50, "performance", "higher_better"],
+
+    # Estabilidade
+    ["PSI", "Population Stability Index", 0.10, 0.25, "stability", "lower_better"],
+    ["CSI_renda", "Characteristic Stability Index da renda", 0.10, 0.25, "stability", "lower_better"],
+    ["CSI_idade", "Characteristic Stability Index da idade", 0.10, 0.25, "stability", "lower_better"],
+    ["CSI_atraso_max", "Characteristic Stability Index do atraso máximo", 0.10, 0.25, "stability", "lower_better"],
+    ["CSI_segmento", "Characteristic Stability Index do segmento", 0.10, 0.25, "stability", "lower_better"],
+
+    # Default / IFRS9
+    ["taxa_default_realizada", "Taxa de default realizada no mês", None, None, "default", "neutral"],
+    ["taxa_default_estimada", "Taxa de default estimada pelo modelo", None, None, "default", "neutral"],
+    ["vol_contratos", "Volume de contratos analisados no mês", 1000, 5000, "default", "neutral"],
+
+    # Risco
+    ["risk_score", "Score de risco médio do modelo", 0.02, 0.05, "risk", "lower_better"],
+    ["risk_level", "Nível de risco categórico do modelo (low, medium, high)", None, None, "risk", "neutral"]
+]
+
+
+def metrics_description():
+    """Tabela metricas_descricao com thresholds e direção de cada métrica"""
+    return pd.DataFrame(
+        METRICS_DESCRIPTION,
+        columns=["metric_name", "description", "attention", "alert", "type", "direction"]
+    )
+
+
+def generate_models(n_models, rng):
+    """Inventário de modelos simulado (tabela models)"""
+    ids = np.arange(1, n_models + 1)
+    qual = rng.integers(0, len(MODEL_RISK_LEVELS), n_models)
+    quant = rng.integers(0, len(MODEL_RISK_LEVELS), n_models)
+    levels = np.array(MODEL_RISK_LEVELS, dtype=object)
+
+    return pd.DataFrame({
+        "id": ids,
+        "name": [f"MPD_{i:02d}" for i in ids],
+        "description": "Modelo de PD IFRS9",
+        "type": np.where(rng.random(n_models) < 0.5, "binary", "continuous"),
+        "vol_carteira": rng.integers(10, 26, n_models) * 100_000,
+        "risco_qualitativo": levels[qual],
+        "risco_quantitativo": levels[quant],
+        "risco_geral": levels[np.maximum(qual, quant)],
+    })
+
+
+def generate_metrics(models, months, rng):
+    """
+    Tabela longa de métricas mensais para os modelos informados.
+
+    Todas as métricas são sorteadas como arrays (modelos x meses) e as taxas de
+    default são sorteadas já agregadas: a taxa realizada como Binomial(vol, 2%)/vol
+    e a estimada pela distribuição da média de vol sorteios U(1%, 5%).
+    Retorna o esquema tipado de modules.storage (metric_value numérico e
+    metric_level para risk_level), na ordem modelo, mês, métrica.
+    """
+    n_models, n_months = len(models), len(months)
+    shape = (n_models, n_months)
+    vol_carteira = models["vol_carteira"].to_numpy()[:, None]
+
+    values = {}
+    for metric in METRICS_PERF:
+        low, high = (0.7, 0.95) if metric in METRICS_PERF_HIGH else (0.2, 0.4)
+        values[metric] = np.round(rng.uniform(low, high, shape), 2)
+    values["PSI"] = np.round(rng.uniform(0.05, 0.15, shape), 2)
+
+    low = (0.03 * vol_carteira).astype(np.int64)
+    high = (0.05 * vol_carteira).astype(np.int64)
+    vol = rng.integers(low, high, shape)
+    taxa_est = rng.normal(0.03, 0.04 / np.sqrt(12 * vol))
+    values["taxa_default_realizada"] = np.round(rng.binomial(vol, 0.02) / vol, 4)
+    values["taxa_default_estimada"] = np.round(taxa_est, 4)
+    values["vol_contratos"] = vol.astype(float)
+    values["risk_score"] = np.round(taxa_est, 4)
+    values["risk_level"] = np.full(shape, np.nan)
+
+    # (modelos, meses, métricas) achatado na ordem modelo -> mês -> métrica
+    n_metrics = len(METRIC_NAMES)
+    stacked = np.stack([values[m] for m in METRIC_NAMES], axis=-1).ravel()
+    level_codes = np.digitize(taxa_est, [0.02, 0.04])
+    levels = np.full(shape + (n_metrics,), -1, dtype=np.int8)
+    levels[..., METRIC_NAMES.index("risk_level")] = level_codes
+
+    n_blocks = n_models * n_months
+    return pd.DataFrame({
+        "model_id": np.repeat(models["id"].to_numpy(), n_months * n_metrics),
+        "metric_name": pd.Categorical.from_codes(np.tile(np.arange(n_metrics), n_blocks), METRIC_NAMES),
+        "metric_value": stacked,
+        "metric_level": pd.Categorical.from_codes(levels.ravel(), RISK_LEVELS),
+        "metric_type": pd.Categorical.from_codes(np.tile(METRIC_TYPE_CODES, n_blocks), METRIC_TYPE_NAMES),
+        "date": np.tile(np.repeat(np.asarray(months, dtype="datetime64[ns]"), n_metrics), n_models),
+    })
+
+
+def generate_scores(model_id, months, n_contracts, rng, drift=0.02, continuous=False):
+    """
+    Extrato de score por contrato de um modelo (entrada do modules.stability e do
+    modules.performance): n_contracts contratos por mês com o score (PD), o target
+    e as variáveis do modelo. O target é o default observado (0/1, sorteado com a
+    própria PD) ou, para modelos contínuos, a PD com ruído.
+    As distribuições se deslocam drift por mês, para que o PSI/CSI cresça com o tempo.
+    """
+    n_months = len(months)
+    shift = np.repeat(np.arange(n_months) * drift * rng.uniform(0.5, 1.5), n_contracts)
+    size = n_months * n_contracts
+    renda = rng.lognormal(8.0 + shift, 0.6)
+    # Renda não informada em ~2% dos contratos
+    renda[rng.random(size) < 0.02] = np.nan
+    score = rng.beta(2 * (1 + shift), 60)
+    if continuous:
+        target = np.round(np.clip(score + rng.normal(0, 0.01, size), 0, 1), 4)
+    else:
+        # O modelo perde discriminação conforme a população se desloca
+        target = (rng.random(size) < score * (1 - shift) + 0.03 * shift).astype(np.int8)
+    return pd.DataFrame({
+        "model_id": model_id,
+        "date": np.repeat(np.asarray(months, dtype="datetime64[ns]"), n_contracts),
+        "score": score,
+        "target": target,
+        "renda": np.round(renda, 2),
+        "idade": np.clip(np.round(rng.normal(42 - 10 * shift, 12)), 18, 90),
+        "atraso_max": rng.poisson(3 * (1 + shift)),
+        "segmento": np.where(rng.random(size) < 0.7 - shift, "varejo", "alta_renda"),
+    })
+
+
+def generate_contracts(model_id, months, n_contracts, rng):
+    """
+    Extrato de contratos de um modelo (entrada do modules.default_rates): n_contracts
+    contratos por mês com a PD do modelo, o default observado (sorteado com a PD)
+    e a exposição.
+    """
+    size = len(months) * n_contracts
+    pd_ = rng.beta(2, 60, size)
+    return pd.DataFrame({
+        "model_id": model_id,
+        "month": np.repeat(np.asarray(months, dtype="datetime64[ns]"), n_contracts),
+        "pd": pd_.astype(np.float32),
+        "default": (rng.random(size) < pd_).astype(np.uint8),
+        "exposure": np.round(rng.lognormal(9, 1, size), 2),
+    })
+
+
+def iter_metrics(models, months, rng, models_per_chunk=500):
+    """Gera a tabela de métricas em blocos de models_per_chunk modelos"""
+    for start in range(0, len(models), models_per_chunk):
+        yield generate_metrics(models.iloc[start:start + models_per_chunk], months, rng)
+
+
+def to_legacy_format(df):
+    """
+    Converte o esquema tipado para o CSV original (5 colunas), em que metric_value
+    mistura números e os níveis de risk_level.
+    """
+    levels = df["metric_level"].astype(object)
+    return pd.DataFrame({
+        "model_id": df["model_id"],
+        "metric_name": df["metric_name"],
+        "metric_value": df["metric_value"].astype(object).where(levels.isna(), levels),
+        "metric_type": df["metric_type"],
+        "date": df["date"].dt.strftime("%Y-%m-%d"),
+    })
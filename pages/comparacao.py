@@ -0,0 +1,112 @@
+import streamlit as st
+from modules.data_store import data_version, get_dataset, get_metrics_store
+from modules.figure_cache import cached_figure
+from modules.graficos import plot_metric_comparison
+from utils.profiling import span
+
+# Máximo de séries sobrepostas no gráfico
+MAX_SERIES = 200
+# Tipos de métrica comparáveis entre modelos
+COMPARISON_TYPES = ["performance", "stability"]
+# Colunas de models usadas para selecionar um grupo inteiro de modelos
+GROUP_COLUMNS = {"Tipo de modelo": "type", "Risco geral": "risco_geral"}
+
+# -----------------------------
+# Função principal da página
+# -----------------------------
+def run():
+    """
+    Página: Comparação de Modelos
+    Sobrepõe a série de uma métrica (ex.: ROC-AUC, PSI) de vários modelos,
+    escolhidos um a um ou por grupo, com as faixas de atenção/alerta ao fundo.
+    """
+    st.title("Comparação de Modelos")
+
+    # -----------------------------
+    # Obter dados compartilhados
+    # -----------------------------
+    with span("load"):
+        df_models = get_dataset("models")
+        store = get_metrics_store()
+        df_metrics_desc = get_dataset("metricas_info")
+
+    if df_models is None or store is None or df_metrics_desc is None:
+        st.warning("⚠️ Dados não disponíveis. Verifique o carregamento no app principal.")
+        return
+
+    # -----------------------------
+    # Sidebar: filtros
+    # -----------------------------
+    st.sidebar.header("⚙️ Filtros")
+
+    metric_options = df_metrics_desc[df_metrics_desc["type"].isin(COMPARISON_TYPES)]["metric_name"].tolist()
+    selected_metric = st.sidebar.selectbox("Selecione a Métrica", metric_options)
+
+    # Modelos escolhidos um a um ou todos os de um grupo (tipo, nível de risco)
+    mode = st.sidebar.selectbox("Selecionar modelos por", ["Modelo", *GROUP_COLUMNS])
+    if mode == "Modelo":
+        model_names = df_models["name"].tolist()
+        chosen = st.sidebar.multiselect("Modelos", model_names, default=model_names[:5])
+        selected = df_models[df_models["name"].isin(chosen)]
+    else:
+        column = GROUP_COLUMNS[mode]
+        group = st.sidebar.selectbox(mode, sorted(df_models[column].dropna().unique().tolist()))
+        selected = df_models[df_models[column] == group]
+
+    if len(selected) > MAX_SERIES:
+        st.sidebar.warning(f"⚠️ {len(selected)} modelos selecionados; exibindo os {MAX_SERIES} primeiros.")
+        selected = selected.head(MAX_SERIES)
+
+    # -----------------------------
+    # Seleção do período
+    # -----------------------------
+    st.sidebar.markdown("### Período de Visualização")
+    start_date = st.sidebar.date_input("Data Início", value=store.date_min)
+    end_date = st.sidebar.date_input("Data Fim", value=store.date_max)
+
+    if start_date > end_date:
+        st.sidebar.warning("⚠️ Data Início não pode ser maior que Data Fim.")
+
+    # -----------------------------
+    # Séries de todos os modelos em uma única consulta ao índice
+    # -----------------------------
+    model_ids = selected["id"].tolist()
+    with span("filter", "get_series_many"):
+        df = store.get_series_many(model_ids, selected_metric, start_date, end_date)
+
+    if df.empty:
+        st.warning("⚠️ Não há dados disponíveis para os modelos/métrica selecionados.")
+        return
+
+    # -----------------------------
+    # Gráfico de comparação (WebGL)
+    # -----------------------------
+    desc_row = df_metrics_desc[df_metrics_desc["metric_name"] == selected_metric]
+    thresholds = {}
+    direction = "neutral"
+    if not desc_row.empty:
+        thresholds = {"attention": desc_row["attention"].values[0], "alert": desc_row["alert"].values[0]}
+        direction = desc_row["direction"].values[0]
+
+    names = selected.set_index("id")["name"]
+    with span("build", "plot_metric_comparison"):
+        fig = cached_figure(
+            plot_metric_comparison, model_ids,
+            (selected_metric, start_date, end_date, data_version()),
+            lambda: plot_metric_comparison(df, selected_metric, names, thresholds, direction),
+        )
+    with span("render", "plot_metric_comparison"):
+        st.plotly_chart(fig, use_container_width=True)
+    st.caption(f"{df['model_id'].nunique()} modelos · {len(df)} pontos")
+
+    # -----------------------------
+    # Último valor de cada modelo
+    # -----------------------------
+    with st.expander("Último valor por modelo", expanded=False):
+        latest = df.groupby("model_id", sort=False).tail(1)
+        st.dataframe(
+            latest.assign(name=latest["model_id"].map(names))[["name", "date", "metric_value"]]
+            .sort_values("metric_value", ascending=direction == "higher_better"),
+            use_container_width=True,
+            hide_index=True,
+        )
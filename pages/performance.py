@@ -1,7 +1,10 @@
 import streamlit as st
 from utils.utils import format_brl_volume
 from modules.graficos import plot_metric_interactive
-import pandas as pd
+from modules.data_store import data_version, get_dataset, get_metrics_store, get_rollups
+from modules.figure_cache import cached_figure
+from modules.rollups import FREQ_LABELS, MAX_POINTS, chart_series
+from utils.profiling import span
 
 # -----------------------------
 # Função principal da página
@@ -16,13 +19,14 @@ def run():
     st.markdown("<div style='height:2rem'></div>", unsafe_allow_html=True)  # Espaçamento superior
 
     # -----------------------------
-    # Obter dados do session_state
+    # Obter dados compartilhados
     # -----------------------------
-    df_models = st.session_state.get("models")
-    df_metrics = st.session_state.get("metrics")
-    df_metrics_desc = st.session_state.get("metricas_info")
+    with span("load"):
+        df_models = get_dataset("models")
+        store = get_metrics_store()
+        df_metrics_desc = get_dataset("metricas_info")
 
-    if df_models is None or df_metrics is None or df_metrics_desc is None:
+    if df_models is None or store is None or df_metrics_desc is None:
         st.warning("⚠️ Dados não disponíveis. Verifique o carregamento no app principal.")
         return
 
@@ -41,10 +45,8 @@ def run():
     # -----------------------------
     metrics_desc_performance = df_metrics_desc[df_metrics_desc["type"] == "performance"]["metric_name"].tolist()
 
-    metrics_model = df_metrics[
-        (df_metrics["model_id"] == model_id) &
-        (df_metrics["metric_name"].isin(metrics_desc_performance))
-    ]["metric_name"].unique().tolist()
+    available = set(store.metric_names(model_id))
+    metrics_model = [m for m in metrics_desc_performance if m in available]
 
     selected_metric = st.sidebar.selectbox("Selecione a Métrica", metrics_model)
     
@@ -52,9 +54,8 @@ def run():
     # Seleção do período
     # -----------------------------
     st.sidebar.markdown("### Período de Visualização")
-    df_metrics["date"] = pd.to_datetime(df_metrics["date"])
-    start_date = st.sidebar.date_input("Data Início", value=df_metrics["date"].min())
-    end_date = st.sidebar.date_input("Data Fim", value=df_metrics["date"].max())
+    start_date = st.sidebar.date_input("Data Início", value=store.date_min)
+    end_date = st.sidebar.date_input("Data Fim", value=store.date_max)
 
     if start_date > end_date:
         st.sidebar.warning("⚠️ Data Início não pode ser maior que Data Fim.")
@@ -62,12 +63,12 @@ def run():
     # -----------------------------
     # Filtrar dados pelo modelo, métrica e período
     # -----------------------------
-    df_filtered = df_metrics[
-        (df_metrics["model_id"] == model_id) &
-        (df_metrics["metric_name"] == selected_metric) &
-        (df_metrics["date"] >= pd.to_datetime(start_date)) &
-        (df_metrics["date"] <= pd.to_datetime(end_date))
-    ].sort_values("date")
+    with span("filter"):
+        df_filtered = store.get_series(model_id, selected_metric, start_date, end_date)
+
+    # Períodos longos são exibidos agregados (mês/trimestre/ano) para limitar os pontos do gráfico
+    with span("filter", "chart_series"):
+        df_chart, freq = chart_series(store, get_rollups(), model_id, [selected_metric], start_date, end_date)
 
     # -----------------------------
     # Layout com 2 colunas
@@ -110,9 +111,17 @@ def run():
             # Obter direção da métrica
             direction = thresholds_row["direction"].values[0] if not thresholds_row.empty else "neutral"
 
-            # Gerar gráfico interativo Plotly
-            fig = plot_metric_interactive(df_filtered, selected_metric, thresholds, direction)
-            st.plotly_chart(fig, use_container_width=True)
+            # Gerar gráfico interativo Plotly (reaproveitado se as entradas não mudaram)
+            with span("build", "plot_metric_interactive"):
+                fig = cached_figure(
+                    plot_metric_interactive, model_id,
+                    (selected_metric, start_date, end_date, direction, data_version()),
+                    lambda: plot_metric_interactive(df_chart, selected_metric, thresholds, direction, max_points=MAX_POINTS),
+                )
+            with span("render", "plot_metric_interactive"):
+                st.plotly_chart(fig, use_container_width=True)
+            if freq is not None:
+                st.caption(f"{len(df_filtered)} pontos agregados por {FREQ_LABELS[freq]}: média do período, faixa mín–máx.")
     # -----------------------------
     # Tabela expandível de métricas
     # -----------------------------
@@ -1,16 +1,20 @@
 import streamlit as st
-import pandas as pd
 from utils.utils import format_brl_volume
-from modules.metrics import prepare_default_rates, calculate_error
+from modules.metrics import DEFAULT_RATE_METRICS, compute_default_rates, default_rates_frame, error_frame
 from modules.graficos import plot_default_rates, plot_n_contratos, plot_pd_error
+from modules.data_store import data_version, get_dataset, get_metrics_store, get_rollups
+from modules.figure_cache import cached_figure
+from modules.rollups import FREQ_LABELS, MAX_POINTS, chart_series
+from utils.profiling import span
 
 def run():
     st.markdown("<div style='height:2rem'></div>", unsafe_allow_html=True)
 
-    df_models = st.session_state.get("models")
-    df_metrics = st.session_state.get("metrics")
+    with span("load"):
+        df_models = get_dataset("models")
+        store = get_metrics_store()
 
-    if df_models is None or df_metrics is None:
+    if df_models is None or store is None:
         st.warning("⚠️ Dados não disponíveis.")
         return
 
@@ -22,19 +26,20 @@ def run():
 
     error_view = st.sidebar.selectbox("Exibir erro em:", ["Taxa (%)", "Valor Monetário (R$)"])
     st.sidebar.markdown("### Período")
-    df_metrics["date"] = pd.to_datetime(df_metrics["date"])
-    start_date = st.sidebar.date_input("Início", value=df_metrics["date"].min())
-    end_date = st.sidebar.date_input("Fim", value=df_metrics["date"].max())
+    start_date = st.sidebar.date_input("Início", value=store.date_min)
+    end_date = st.sidebar.date_input("Fim", value=store.date_max)
 
     if start_date > end_date:
         st.sidebar.warning("⚠️ Data Início > Data Fim.")
         return
 
     # --- Filtragem ---
-    df_filtered = df_metrics.query(
-        "model_id == @model_id and metric_name in ['taxa_default_realizada','taxa_default_estimada'] "
-        "and @start_date <= date <= @end_date"
-    ).sort_values("date")
+    with span("filter"):
+        df_filtered = store.get_metrics(model_id, DEFAULT_RATE_METRICS, start_date, end_date).sort_values("date", kind="stable")
+
+    # Períodos longos: taxas agregadas por período, ponderadas pelo volume de contratos
+    with span("filter", "chart_series"):
+        df_chart, freq = chart_series(store, get_rollups(), model_id, DEFAULT_RATE_METRICS, start_date, end_date)
 
     if df_filtered.empty:
         st.warning("⚠️ Sem dados para este modelo.")
@@ -45,21 +50,46 @@ def run():
     # --- Layout principal ---
     col1, col2 = st.columns([1, 3], gap="medium")
 
+    # Taxas, erros e últimos valores em uma única passada; os gráficos reaproveitam
+    # o resultado, exceto quando usam as séries agregadas por período
+    with span("transform", "compute_default_rates"):
+        rates = compute_default_rates(df_filtered, vol)
+
+    def chart_rates():
+        return rates if freq is None else compute_default_rates(df_chart, vol)
+
     with col1:
-        df_pivot = df_filtered.pivot(index="date", columns="metric_name", values="metric_value").reset_index()
-        last_real = float(df_pivot["taxa_default_realizada"].values[-1])
-        last_est = float(df_pivot["taxa_default_estimada"].values[-1])
+        last_real = float(rates["latest"]["realizada"][-1])
+        last_est = float(rates["latest"]["estimada"][-1])
 
         st.metric("Volume Carteira", format_brl_volume(vol))
         st.metric("Última Realizada", f"{last_real*100:.2f}% | {format_brl_volume(last_real*vol)}")
         st.metric("Última Estimada", f"{last_est*100:.2f}% | {format_brl_volume(last_est*vol)}")
 
     with col2:
-        df_rates = prepare_default_rates(df_filtered)
-        st.plotly_chart(plot_default_rates(df_rates), use_container_width=True)
+        version = data_version()
+
+        def build_rates():
+            with span("transform", "default_rates_frame"):
+                df_rates = default_rates_frame(chart_rates())
+            return plot_default_rates(df_rates, max_points=MAX_POINTS)
+
+        with span("build", "plot_default_rates"):
+            fig_rates = cached_figure(plot_default_rates, model_id, (start_date, end_date, version), build_rates)
+        with span("render", "plot_default_rates"):
+            st.plotly_chart(fig_rates, use_container_width=True)
+
+        def build_error():
+            with span("transform", "error_frame"):
+                df_error, ytitle, yrange, tsuffix = error_frame(chart_rates(), error_view)
+            return plot_pd_error(df_error, ytitle, yrange, tsuffix, max_points=MAX_POINTS)
 
-        df_error, ytitle, yrange, tsuffix = calculate_error(df_filtered, vol, error_view)
-        st.plotly_chart(plot_pd_error(df_error, ytitle, yrange, tsuffix), use_container_width=True)
+        with span("build", "plot_pd_error"):
+            fig_error = cached_figure(plot_pd_error, model_id, (start_date, end_date, error_view, version), build_error)
+        with span("render", "plot_pd_error"):
+            st.plotly_chart(fig_error, use_container_width=True)
+        if freq is not None:
+            st.caption(f"Taxas agregadas por {FREQ_LABELS[freq]} (média ponderada por volume de contratos).")
         
 
     st.markdown("<div style='height:2rem'></div>", unsafe_allow_html=True)
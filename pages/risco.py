@@ -1,5 +1,7 @@
 import streamlit as st
 from modules.risk_matrix import plot_risk_matrix
+from modules.data_store import get_dataset
+from utils.profiling import span
 
 # -----------------------------
 # Função principal da página
@@ -12,9 +14,10 @@ def run():
     st.title("Risco dos Modelos")
 
     # -----------------------------
-    # Usar dados carregados no session_state
+    # Usar dados compartilhados
     # -----------------------------
-    df = st.session_state.get("models")
+    with span("load"):
+        df = get_dataset("models")
     if df is None or df.empty:
         st.warning("⚠️ Não há dados de modelos disponíveis.")
         return
@@ -29,5 +32,7 @@ def run():
     # -----------------------------
     # Gerar e exibir a matriz de risco
     # -----------------------------
-    fig = plot_risk_matrix(df)
-    st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
+    with span("build", "plot_risk_matrix"):
+        fig = plot_risk_matrix(df)
+    with span("render", "plot_risk_matrix"):
+        st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
@@ -0,0 +1,136 @@
+import streamlit as st
+import numpy as np
+from modules.alerts import RULE_LABELS, build_alerts, update_alerts
+from modules.data_store import cached_derived, get_dataset, get_metrics_store
+from modules.metrics import STATUS_ALERT, STATUS_ATTENTION, STATUS_GOOD
+from modules.portfolio import PORTFOLIO_TYPES, portfolio_status, update_portfolio_status
+from utils.profiling import span
+
+STATUS_ICONS = np.array(["🟢", "🟡", "🔴"], dtype=object)
+TREND_ICONS = {1: "↑", -1: "↓", 0: "→"}
+# Eventos de alerta exibidos (os mais recentes)
+MAX_EVENTS = 500
+
+# -----------------------------
+# Agregados compartilhados (ver data_store.cached_derived)
+# -----------------------------
+# Recebem o store vigente e leem as tabelas auxiliares na hora do cálculo, e não
+# as da sessão que registrou o agregado
+def _build_status(store):
+    return portfolio_status(store, get_dataset("metricas_info"), get_dataset("models"))
+
+
+def _update_status(current, store, model_ids):
+    return update_portfolio_status(current, store, get_dataset("metricas_info"), get_dataset("models"), model_ids)
+
+
+def _build_alerts(store):
+    return build_alerts(store, get_dataset("metricas_info"))
+
+
+def _update_alerts(current, store, model_ids):
+    return update_alerts(current, store, get_dataset("metricas_info"), model_ids)
+
+
+# -----------------------------
+# Função principal da página
+# -----------------------------
+def run():
+    """
+    Página: Visão Geral da Carteira
+    Status (bom/atenção/alerta) e tendência do último valor de cada métrica
+    para todos os modelos, em uma única grade.
+    """
+    st.title("Visão Geral da Carteira")
+
+    # -----------------------------
+    # Obter dados compartilhados
+    # -----------------------------
+    with span("load"):
+        df_models = get_dataset("models")
+        store = get_metrics_store()
+        df_metrics_desc = get_dataset("metricas_info")
+
+    if df_models is None or store is None or df_metrics_desc is None:
+        st.warning("⚠️ Dados não disponíveis. Verifique o carregamento no app principal.")
+        return
+
+    # Calculado uma vez por versão dos dados para todas as sessões; partições
+    # novas atualizam apenas as linhas dos modelos afetados
+    with span("transform", "portfolio_status"):
+        status = cached_derived("portfolio_status", _build_status, _update_status)
+
+    # -----------------------------
+    # Sidebar: filtros
+    # -----------------------------
+    st.sidebar.header("⚙️ Filtros")
+    types = st.sidebar.multiselect("Tipos de métrica", PORTFOLIO_TYPES, default=["performance", "stability"])
+    only_flagged = st.sidebar.checkbox("Somente modelos com atenção/alerta", value=False)
+
+    with span("filter"):
+        metric_names = df_metrics_desc.loc[df_metrics_desc["type"].isin(types), "metric_name"]
+        view = status[status["metric_name"].isin(metric_names)]
+        if only_flagged:
+            flagged = view.loc[view["status"] > STATUS_GOOD, "model_id"].unique()
+            view = view[view["model_id"].isin(flagged)]
+
+    if view.empty:
+        st.info("Nenhum modelo/métrica para os filtros selecionados.")
+        return
+
+    # -----------------------------
+    # Cards de resumo
+    # -----------------------------
+    col1, col2, col3 = st.columns(3)
+    counts = np.bincount(view["status"].to_numpy(), minlength=3)
+    col1.metric("🟢 Bom", int(counts[STATUS_GOOD]))
+    col2.metric("🟡 Atenção", int(counts[STATUS_ATTENTION]))
+    col3.metric("🔴 Alerta", int(counts[STATUS_ALERT]))
+
+    # -----------------------------
+    # Grade modelo x métrica
+    # -----------------------------
+    with span("transform", "grade"):
+        trend = view["trend"].map(TREND_ICONS)
+        cell = (
+            STATUS_ICONS[view["status"].to_numpy()]
+            + " " + view["value"].round(4).astype(str)
+            + " " + trend
+        )
+        grid = view.assign(cell=cell).pivot(index="name", columns="metric_name", values="cell")
+
+        # Modelos com mais alertas primeiro
+        weight = (view["status"] == STATUS_ALERT) * 10 + (view["status"] == STATUS_ATTENTION)
+        severity = weight.groupby(view["name"]).sum()
+        grid = grid.loc[severity.sort_values(ascending=False, kind="stable").index]
+
+    with span("render", "grade"):
+        st.caption(f"Último valor de cada métrica · {len(grid)} modelos · ↑ melhora, ↓ piora, → estável")
+        st.dataframe(grid, use_container_width=True, height=600)
+
+    with st.expander("Tabela detalhada", expanded=False):
+        st.dataframe(view.drop(columns=["model_id", "status"]), use_container_width=True, hide_index=True)
+
+    # -----------------------------
+    # Eventos de alerta (threshold, CUSUM, EWMA)
+    # -----------------------------
+    # Avaliados sobre todas as séries de uma vez; partições novas reavaliam só os modelos afetados
+    with span("transform", "alerts"):
+        events = cached_derived("alerts", _build_alerts, _update_alerts)
+
+    with span("filter", "alerts"):
+        recent = events[events["model_id"].isin(view["model_id"].unique()) & events["metric_name"].isin(metric_names)]
+        recent = recent.sort_values("date", ascending=False, kind="stable").head(MAX_EVENTS)
+        names = df_models.set_index("id")["name"]
+
+    with st.expander(f"Eventos de alerta ({len(recent)} mais recentes)", expanded=False):
+        st.caption("Threshold: entrada em atenção/alerta · CUSUM/EWMA: desvio persistente em relação aos primeiros meses da série")
+        st.dataframe(
+            recent.assign(
+                name=recent["model_id"].map(names),
+                rule=recent["rule"].map(RULE_LABELS),
+                severity=STATUS_ICONS[recent["severity"].to_numpy(dtype=int)],
+            )[["date", "name", "metric_name", "rule", "severity", "value", "statistic"]],
+            use_container_width=True,
+            hide_index=True,
+        )
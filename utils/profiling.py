@@ -0,0 +1,128 @@
+"""
+Instrumentação de tempo por rerun.
+
+Ativada pela variável de ambiente MONITOR_PROFILING=1. Com ela, cada rerun mede
+as etapas marcadas com span() (load, filter, transform, build, render), mostra os
+tempos em um painel na sidebar e, se MONITOR_PROFILING_LOG apontar para um arquivo,
+acrescenta uma linha JSON por rerun. Desativada, span() não mede nada.
+
+Resumo do log (p50/p95 por página e etapa):
+    python -m utils.profiling logs/timings.jsonl
+"""
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+import streamlit as st
+
+ENABLED = os.environ.get("MONITOR_PROFILING", "") not in ("", "0")
+LOG_PATH = os.environ.get("MONITOR_PROFILING_LOG")
+
+# Cada sessão do Streamlit executa o script em sua própria thread
+_local = threading.local()
+_log_lock = threading.Lock()
+
+
+def start_rerun(page):
+    """Inicia a coleta de tempos de um rerun da página"""
+    if not ENABLED:
+        return
+    _local.page = page
+    _local.spans = []
+    _local.open = []
+    _local.start = time.perf_counter()
+
+
+@contextmanager
+def _timed(stage, label):
+    # Pilha dos spans abertos: cada entrada acumula o tempo dos spans internos,
+    # descontado do externo (o tempo de um span interno só é contado nele)
+    stack = getattr(_local, "open", None)
+    if stack is not None:
+        stack.append(0.0)
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - t0
+        spans = getattr(_local, "spans", None)
+        if spans is not None and stack is not None:
+            children = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            spans.append((stage, label or stage, elapsed - children))
+
+
+def span(stage, label=None):
+    """
+    Mede o bloco with como uma etapa do rerun.
+    Spans aninhados (ex.: transform dentro de um build de figura) registram o
+    tempo próprio: o externo não inclui o dos internos, então a soma por etapa
+    não conta o mesmo intervalo duas vezes.
+    stage: etapa agregada no log (load, filter, transform, build, render)
+    label: descrição opcional exibida no painel (ex.: nome do gráfico)
+    """
+    if not ENABLED:
+        return nullcontext()
+    return _timed(stage, label)
+
+
+def finish_rerun():
+    """Encerra o rerun: grava a linha no log e exibe o painel de debug"""
+    if not ENABLED or getattr(_local, "spans", None) is None:
+        return
+    total = time.perf_counter() - _local.start
+    spans, _local.spans, _local.open = _local.spans, None, None
+
+    stages = {}
+    for stage, _, seconds in spans:
+        stages[stage] = stages.get(stage, 0.0) + seconds
+
+    if LOG_PATH:
+        record = {
+            "ts": datetime.now().isoformat(timespec="seconds"),
+            "page": _local.page,
+            "total_s": round(total, 6),
+            "stages": {k: round(v, 6) for k, v in stages.items()},
+        }
+        with _log_lock:
+            os.makedirs(os.path.dirname(LOG_PATH) or ".", exist_ok=True)
+            with open(LOG_PATH, "a") as f:
+                f.write(json.dumps(record) + "\n")
+
+    with st.sidebar.expander("⏱️ Tempos deste rerun", expanded=False):
+        st.caption(f"Página: {_local.page} · total {total*1000:.1f} ms")
+        st.table({
+            "Etapa": [stage for stage, _, _ in spans],
+            "Item": [label for _, label, _ in spans],
+            "ms (próprio)": [round(seconds * 1000, 2) for _, _, seconds in spans],
+        })
+
+
+def summarize_log(path):
+    """Agrega o log JSON-lines em p50/p95 (ms) por página e etapa"""
+    import pandas as pd
+
+    rows = []
+    with open(path) as f:
+        for line in f:
+            record = json.loads(line)
+            rows.append((record["page"], "total", record["total_s"]))
+            rows.extend((record["page"], stage, seconds) for stage, seconds in record["stages"].items())
+
+    df = pd.DataFrame(rows, columns=["page", "stage", "seconds"])
+    summary = df.groupby(["page", "stage"])["seconds"].agg(
+        n="count",
+        p50=lambda s: s.quantile(0.50),
+        p95=lambda s: s.quantile(0.95),
+    )
+    summary[["p50", "p95"]] *= 1000
+    return summary.rename(columns={"p50": "p50_ms", "p95": "p95_ms"})
+
+
+if __name__ == "__main__":
+    print(summarize_log(sys.argv[1] if len(sys.argv) > 1 else LOG_PATH).round(2).to_string())